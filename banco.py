@@ -0,0 +1,948 @@
+# Camada de dados do app de tarefas. Não depende do Flet: pode ser usada sem
+# abrir a interface (importação/exportação em massa, scripts, benchmarks).
+import sqlite3
+import re
+import csv
+import json
+import sys
+import time
+import logging
+import threading
+import queue
+from concurrent.futures import Future
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+from bisect import bisect_left
+from heapq import nlargest, heappush, heappop, heapify
+
+from medicao import medir_classe
+from recorrencia import proximas_ocorrencias, sem_acento
+
+# Datas gravadas em ISO ("YYYY-MM-DD" e "YYYY-MM-DD HH:MM") para que a ordenação
+# textual seja cronológica e o índice (status, data_limite) sirva para intervalos.
+FORMATO_DATA = "%Y-%m-%d"
+FORMATO_DATA_HORA = "%Y-%m-%d %H:%M"
+TAMANHO_PAGINA = 30
+TAMANHO_CACHE_LEITURA = 128
+LOTE_ESCRITA = 200  # máximo de escritas enfileiradas confirmadas num só commit
+ESPERA_TRAVA = 30  # segundos que o escritor espera outro processo (ex.: importação pela CLI) liberar o banco
+ESPERA_ESCRITA = 60  # segundos que quem escreve espera o commit antes de desistir
+LIMITE_SUGESTOES = 8  # nomes sugeridos no campo "Quem?"
+LOTE_IMPORTACAO = 5000  # linhas por transação na importação em massa
+DIAS_ARQUIVO = 180  # concluídas há mais tempo que isso saem da tabela principal
+LOTE_ARQUIVO = 500  # tarefas movidas para o arquivo por transação
+LOTE_IDS = 500  # ids por consulta "id IN (...)", abaixo do limite de parâmetros do SQLite
+PAGINAS_COMPACTACAO = 256  # páginas liberadas por passo do incremental_vacuum
+ESPERA_MAXIMA_AGENDA = 3600  # a agenda de prazos confere o relógio ao menos a cada hora (suspensão, relógio ajustado)
+COLUNAS = ("id", "titulo", "status", "responsavel", "data_limite", "data_criacao", "data_conclusao", "recorrencia")
+STATUS_VALIDOS = ("pendente", "concluida")
+FASES_BUSCA = (("main", "pendente"), ("main", "concluida"), ("arquivo", "concluida"))  # ordem dos resultados da busca
+
+log_manutencao = logging.getLogger("tarefas.manutencao")
+log_avisos = logging.getLogger("tarefas.avisos")
+
+def formatar_data(valor):
+    # date/datetime ou texto ISO -> dd/mm/YYYY (só para exibição)
+    if not valor: return ""
+    if isinstance(valor, date): return f"{valor.day:02d}/{valor.month:02d}/{valor.year}"
+    return f"{valor[8:10]}/{valor[5:7]}/{valor[0:4]}"
+
+def _ler_data(valor):
+    if not valor: return None
+    try: return date.fromisoformat(valor)
+    except ValueError: return None
+
+def _ler_data_hora(valor):
+    if not valor: return None
+    try: return datetime.fromisoformat(valor)
+    except ValueError: return None
+
+def _interno(texto):
+    # status/responsavel/recorrencia se repetem muito: uma única cópia de cada string
+    return sys.intern(texto) if texto else texto
+
+class Tarefa:
+    # Uma linha de `tarefas` com as datas convertidas uma única vez, ao carregar,
+    # e os campos derivados que o card e os alertas usam.
+    __slots__ = ("id", "titulo", "status", "responsavel", "data_limite", "data_criacao",
+                 "data_conclusao", "recorrencia", "atraso_dias", "no_prazo")
+
+    def __init__(self, id, titulo, status, responsavel, data_limite, data_criacao, data_conclusao, recorrencia):
+        self.id = id
+        self.titulo = titulo
+        self.status = _interno(status)
+        self.responsavel = _interno(responsavel)
+        self.data_limite = _ler_data(data_limite)
+        self.data_criacao = _ler_data_hora(data_criacao)
+        self.data_conclusao = _ler_data_hora(data_conclusao)
+        self.recorrencia = _interno(recorrencia)
+        # atraso_dias: pendente = dias vencida até hoje; concluída = dias de atraso na entrega
+        # no_prazo: só para concluídas com prazo (True/False); senão None
+        self.atraso_dias, self.no_prazo = 0, None
+        if self.data_limite:
+            if self.status == "concluida" and self.data_conclusao:
+                self.atraso_dias = max(0, (self.data_conclusao.date() - self.data_limite).days)
+                self.no_prazo = self.atraso_dias == 0
+            elif self.status == "pendente":
+                self.atraso_dias = max(0, (date.today() - self.data_limite).days)
+
+    @property
+    def concluida(self):
+        return self.status == "concluida"
+
+    def __repr__(self):
+        return f"Tarefa({self.id}, {self.titulo!r}, {self.status!r}, {self.responsavel!r}, {self.data_limite})"
+
+class IndiceNomes:
+    # Nomes ordenados sem acento e em minúsculas ("jo" e "jô" acham "João"); um prefixo vira uma faixa contígua (bisect)
+    # e dela saem os mais usados. Reconstruído do banco só depois de uma escrita.
+    def __init__(self, linhas):
+        self.chaves = sorted((sem_acento(nome), nome) for nome, _, _ in linhas)
+        self.peso = {nome: (usos, ultimo or "") for nome, usos, ultimo in linhas}
+        self.mais_usados = sorted(self.peso, key=self.peso.get, reverse=True)
+
+    def sugerir(self, prefixo, limite=LIMITE_SUGESTOES):
+        prefixo = sem_acento(prefixo.strip())
+        if not prefixo: return self.mais_usados[:limite]
+        inicio = fim = bisect_left(self.chaves, (prefixo,))
+        while fim < len(self.chaves) and self.chaves[fim][0].startswith(prefixo): fim += 1
+        return nlargest(limite, (nome for _, nome in self.chaves[inicio:fim]), key=self.peso.get)
+
+def fabrica_tarefa(cursor, linha):
+    # row_factory do sqlite3 para consultas SELECT * FROM tarefas
+    return Tarefa(*linha)
+
+def normalizar_data(valor, com_hora=False):
+    # Aceita ISO ou dd/mm/YYYY[ HH:MM] e devolve ISO; vazio vira None, inválido levanta ValueError
+    if valor is None or str(valor).strip() == "": return None
+    valor = str(valor).strip()
+    formatos = (FORMATO_DATA_HORA, "%d/%m/%Y %H:%M", FORMATO_DATA, "%d/%m/%Y") if com_hora else (FORMATO_DATA, "%d/%m/%Y")
+    for formato in formatos:
+        try: dt = datetime.strptime(valor, formato)
+        except ValueError: continue
+        return dt.strftime(FORMATO_DATA_HORA if com_hora else FORMATO_DATA)
+    raise ValueError(f"data inválida: {valor!r}")
+
+def _migrar_datas_iso(cursor):
+    # dd/mm/YYYY[ HH:MM] -> YYYY-MM-DD[ HH:MM]; texto vazio ou inválido vira NULL
+    dmy = "[0-3][0-9]/[0-1][0-9]/[0-9][0-9][0-9][0-9]"
+    iso = "[0-9][0-9][0-9][0-9]-[0-1][0-9]-[0-3][0-9]"
+    cursor.execute(f"""
+        UPDATE tarefas SET
+            data_limite = CASE
+                WHEN data_limite GLOB '{dmy}' THEN substr(data_limite, 7, 4) || '-' || substr(data_limite, 4, 2) || '-' || substr(data_limite, 1, 2)
+                WHEN data_limite GLOB '{iso}' THEN data_limite
+                ELSE NULL END,
+            data_criacao = CASE
+                WHEN data_criacao GLOB '{dmy}*' THEN substr(data_criacao, 7, 4) || '-' || substr(data_criacao, 4, 2) || '-' || substr(data_criacao, 1, 2) || substr(data_criacao, 11)
+                WHEN data_criacao GLOB '{iso}*' THEN data_criacao
+                ELSE NULL END,
+            data_conclusao = CASE
+                WHEN data_conclusao GLOB '{dmy}*' THEN substr(data_conclusao, 7, 4) || '-' || substr(data_conclusao, 4, 2) || '-' || substr(data_conclusao, 1, 2) || substr(data_conclusao, 11)
+                WHEN data_conclusao GLOB '{iso}*' THEN data_conclusao
+                ELSE NULL END
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_tarefas_status_limite ON tarefas (status, data_limite)")
+
+def _criar_indice_busca(cursor, esquema="main"):
+    # Índice FTS5 espelhando titulo/responsavel; remove_diacritics faz "acao" achar "ação".
+    # O status também vai para o índice: a busca filtra "status : pendente" sem passar pelas concluídas
+    cursor.execute(f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS {esquema}.tarefas_busca USING fts5(
+            titulo, responsavel, status, content='tarefas', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+        )
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {esquema}.tarefas_busca_ai AFTER INSERT ON tarefas BEGIN
+            INSERT INTO tarefas_busca (rowid, titulo, responsavel, status) VALUES (new.id, new.titulo, new.responsavel, new.status);
+        END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {esquema}.tarefas_busca_ad AFTER DELETE ON tarefas BEGIN
+            INSERT INTO tarefas_busca (tarefas_busca, rowid, titulo, responsavel, status) VALUES ('delete', old.id, old.titulo, old.responsavel, old.status);
+        END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {esquema}.tarefas_busca_au AFTER UPDATE OF titulo, responsavel, status ON tarefas BEGIN
+            INSERT INTO tarefas_busca (tarefas_busca, rowid, titulo, responsavel, status) VALUES ('delete', old.id, old.titulo, old.responsavel, old.status);
+            INSERT INTO tarefas_busca (rowid, titulo, responsavel, status) VALUES (new.id, new.titulo, new.responsavel, new.status);
+        END
+    """)
+    cursor.execute(f"INSERT INTO {esquema}.tarefas_busca (tarefas_busca) VALUES ('rebuild')")
+
+def _indexar_status_na_busca(cursor):
+    # Refaz o índice da versão 2 (só titulo/responsavel) já com a coluna status
+    for nome in ("tarefas_busca_ai", "tarefas_busca_ad", "tarefas_busca_au"):
+        cursor.execute(f"DROP TRIGGER IF EXISTS {nome}")
+    cursor.execute("DROP TABLE IF EXISTS tarefas_busca")
+    _criar_indice_busca(cursor)
+
+def _criar_indice_paginas(cursor):
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_tarefas_status_id ON tarefas (status, id)")
+
+# Contribuição de uma linha (new/old) para cada contador de contagem_responsaveis
+def _parcelas_contagem(x):
+    return (f"COALESCE({x}.responsavel, '')", "1",
+            f"{x}.status = 'pendente'",
+            f"{x}.status = 'concluida'",
+            f"{x}.status = 'concluida' AND {x}.data_limite IS NOT NULL AND substr({x}.data_conclusao, 1, 10) <= {x}.data_limite",
+            f"{x}.status = 'concluida' AND {x}.data_limite IS NOT NULL AND substr({x}.data_conclusao, 1, 10) > {x}.data_limite")
+
+def _criar_tabela_contagem(cursor, esquema="main"):
+    cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS {esquema}.contagem_responsaveis (
+            responsavel TEXT PRIMARY KEY,
+            total INTEGER NOT NULL DEFAULT 0,
+            pendentes INTEGER NOT NULL DEFAULT 0,
+            concluidas INTEGER NOT NULL DEFAULT 0,
+            no_prazo INTEGER NOT NULL DEFAULT 0,
+            atrasadas INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+
+def _criar_contagem_responsaveis(cursor):
+    # Placar por pessoa mantido por triggers: abrir Resumo/Gráficos custa O(pessoas)
+    _criar_tabela_contagem(cursor)
+    def somar(x, sinal):
+        resp, *parcelas = _parcelas_contagem(x)
+        valores = ", ".join(f"{sinal}({p})" for p in parcelas)
+        return f"""
+            INSERT INTO contagem_responsaveis (responsavel, total, pendentes, concluidas, no_prazo, atrasadas)
+            VALUES ({resp}, {valores})
+            ON CONFLICT (responsavel) DO UPDATE SET
+                total = total + excluded.total, pendentes = pendentes + excluded.pendentes,
+                concluidas = concluidas + excluded.concluidas, no_prazo = no_prazo + excluded.no_prazo,
+                atrasadas = atrasadas + excluded.atrasadas;"""
+    cursor.execute(f"CREATE TRIGGER IF NOT EXISTS contagem_ai AFTER INSERT ON tarefas BEGIN {somar('new', '+')} END")
+    cursor.execute(f"CREATE TRIGGER IF NOT EXISTS contagem_ad AFTER DELETE ON tarefas BEGIN {somar('old', '-')} END")
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS contagem_au AFTER UPDATE OF status, responsavel, data_limite, data_conclusao ON tarefas
+        BEGIN {somar('old', '-')} {somar('new', '+')} END""")
+    _recontar_responsaveis(cursor)
+
+def _recontar_responsaveis(cursor):
+    resp, *parcelas = _parcelas_contagem("t")
+    somas = ", ".join(f"SUM({p})" for p in parcelas)
+    cursor.execute("DELETE FROM contagem_responsaveis")
+    cursor.execute(f"""
+        INSERT INTO contagem_responsaveis (responsavel, total, pendentes, concluidas, no_prazo, atrasadas)
+        SELECT {resp}, {somas} FROM tarefas t GROUP BY {resp}""")
+
+def _criar_indice_conclusao(cursor):
+    # Usado pelo arquivamento: concluídas mais antigas que N dias
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_tarefas_status_conclusao ON tarefas (status, data_conclusao)")
+
+def _criar_esquema_arquivo(cursor):
+    # Banco anexado "arquivo": concluídas antigas, com a própria busca FTS e o próprio placar
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS arquivo.tarefas (
+            id INTEGER PRIMARY KEY,
+            titulo TEXT,
+            status TEXT,
+            responsavel TEXT,
+            data_limite TEXT,
+            data_criacao TEXT,
+            data_conclusao TEXT,
+            recorrencia TEXT
+        )
+    """)
+    existe = cursor.execute("SELECT 1 FROM arquivo.sqlite_master WHERE name = 'tarefas_busca'").fetchone()
+    if not existe: _criar_indice_busca(cursor, "arquivo")
+    _criar_tabela_contagem(cursor, "arquivo")
+
+def _criar_registro_responsaveis(cursor):
+    # Uma linha por pessoa com quantas tarefas usam o nome e quando foi usado por último
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS responsaveis (
+            nome TEXT PRIMARY KEY,
+            usos INTEGER NOT NULL DEFAULT 0,
+            ultimo_uso TEXT
+        )
+    """)
+    usar = """
+        INSERT INTO responsaveis (nome, usos, ultimo_uso)
+        SELECT new.responsavel, 1, new.data_criacao WHERE trim(COALESCE(new.responsavel, '')) != ''
+        ON CONFLICT (nome) DO UPDATE SET usos = usos + 1, ultimo_uso = max(COALESCE(ultimo_uso, ''), COALESCE(excluded.ultimo_uso, ''));"""
+    cursor.execute(f"CREATE TRIGGER IF NOT EXISTS responsaveis_ai AFTER INSERT ON tarefas BEGIN {usar} END")
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS responsaveis_ad AFTER DELETE ON tarefas BEGIN
+            UPDATE responsaveis SET usos = usos - 1 WHERE nome = old.responsavel;
+        END""")
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS responsaveis_au AFTER UPDATE OF responsavel ON tarefas
+        WHEN old.responsavel IS NOT new.responsavel BEGIN
+            UPDATE responsaveis SET usos = usos - 1 WHERE nome = old.responsavel;
+            {usar}
+        END""")
+    cursor.execute("""
+        INSERT INTO responsaveis (nome, usos, ultimo_uso)
+        SELECT responsavel, COUNT(*), MAX(data_criacao) FROM tarefas
+        WHERE trim(COALESCE(responsavel, '')) != '' GROUP BY responsavel""")
+
+# Cada posição corresponde a uma versão do esquema (PRAGMA user_version).
+# Bancos antigos sobem de versão no próprio arquivo ao abrir o app.
+MIGRACOES = [
+    _migrar_datas_iso,  # 1: datas em ISO + índice (status, data_limite)
+    _criar_indice_busca,  # 2: busca textual FTS5
+    _criar_indice_paginas,  # 3: paginação por (status, id)
+    _criar_contagem_responsaveis,  # 4: placar por pessoa mantido por triggers
+    _criar_indice_conclusao,  # 5: índice (status, data_conclusao) para o arquivamento
+    _criar_registro_responsaveis,  # 6: registro de pessoas para o autocompletar
+    _indexar_status_na_busca,  # 7: status dentro do índice FTS5
+]
+
+@medir_classe("db")
+class Database:
+    # Leituras usam uma conexão por thread (WAL: nunca esperam o escritor).
+    # Escritas vão para uma fila atendida por uma única thread, que junta as
+    # que chegarem juntas numa só transação (um fsync por lote).
+    def __init__(self, caminho="banco_tarefas_v8.db"):
+        self.caminho = caminho
+        # Concluídas antigas vão para um segundo arquivo, anexado como "arquivo" em todas as conexões
+        self.caminho_arquivo = re.sub(r"(\.db)?$", "_arquivo.db", caminho, count=1)
+        self.conn = sqlite3.connect(caminho, check_same_thread=False, isolation_level=None, timeout=ESPERA_TRAVA)
+        self.conn.execute("PRAGMA auto_vacuum = INCREMENTAL")  # só vale para bancos novos; os antigos: python banco.py compactar
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.execute("PRAGMA synchronous = NORMAL")
+        self.conn.execute("ATTACH DATABASE ? AS arquivo", (self.caminho_arquivo,))
+        self.conn.execute("PRAGMA arquivo.auto_vacuum = INCREMENTAL")
+        self.conn.execute("PRAGMA arquivo.journal_mode = WAL")
+        self.local = threading.local()
+        # Cache de leituras compartilhado por todas as sessões (LRU); qualquer escrita descarta tudo.
+        # versao_cache impede que uma leitura iniciada antes de um commit guarde resultado velho.
+        self.cache_leitura = OrderedDict()
+        self.versao_cache = 0
+        self.trava_cache = threading.Lock()
+        # Escritas de outros processos (ex.: python banco.py importar) não passam pela fila: uma conexão
+        # só para consultar data_version, que muda a cada commit feito por outra conexão nos dois arquivos
+        self.conn_versao = sqlite3.connect(caminho, check_same_thread=False)
+        self.conn_versao.execute("ATTACH DATABASE ? AS arquivo", (self.caminho_arquivo,))
+        self.versao_dados = None
+        # Avisos de mudança ("salvas", "removidas", "recarregar") entregues numa thread própria
+        self.assinantes = []
+        self.fila_avisos = queue.Queue()
+        self.agenda = None
+        threading.Thread(target=self._laco_avisos, name="avisos-db", daemon=True).start()
+        self.criar_tabela()
+        self.migrar()
+        _criar_esquema_arquivo(self.conn.cursor())
+        self.fila_escrita = queue.Queue()
+        self.escritor = threading.Thread(target=self._laco_escritor, name="escritor-db", daemon=True)
+        self.escritor.start()
+
+    def criar_tabela(self):
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS tarefas (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                titulo TEXT,
+                status TEXT,
+                responsavel TEXT,
+                data_limite TEXT,
+                data_criacao TEXT,
+                data_conclusao TEXT,
+                recorrencia TEXT
+            )
+        """)
+
+    def migrar(self):
+        cursor = self.conn.cursor()
+        versao = cursor.execute("PRAGMA user_version").fetchone()[0]
+        for numero, migracao in enumerate(MIGRACOES[versao:], start=versao + 1):
+            cursor.execute("BEGIN IMMEDIATE")
+            try:
+                migracao(cursor)
+                cursor.execute(f"PRAGMA user_version = {numero}")
+                cursor.execute("COMMIT")
+            except Exception:
+                cursor.execute("ROLLBACK")
+                raise
+
+    def fechar(self):
+        if self.agenda: self.agenda.parar()
+        self.fila_escrita.put(None)
+        self.escritor.join()
+        self.fila_avisos.put(None)
+        self.conn_versao.close()
+        self.conn.close()
+
+    # --- avisos de mudança ---
+    def assinar(self, funcao):
+        # funcao(tipo, dados) é chamada após cada commit: ("salvas", [Tarefa]), ("removidas", [id]) ou ("recarregar", None);
+        # com a agenda ligada, também ("prazos", [Tarefa]) quando pendentes entram no alerta ou vencem
+        with self.trava_cache: self.assinantes = self.assinantes + [funcao]
+
+    def cancelar_assinatura(self, funcao):
+        with self.trava_cache: self.assinantes = [f for f in self.assinantes if f is not funcao]
+
+    def _publicar(self, tipo, dados=None):
+        self.fila_avisos.put((tipo, dados))
+
+    def _laco_avisos(self):
+        while True:
+            aviso = self.fila_avisos.get()
+            if aviso is None: return
+            for funcao in self.assinantes:
+                try: funcao(*aviso)
+                except Exception: log_avisos.exception("assinante falhou ao tratar %s", aviso[0])
+
+    # --- conexões ---
+    def _leitor(self):
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.caminho)
+            conn.execute("ATTACH DATABASE ? AS arquivo", (self.caminho_arquivo,))
+            conn.execute("PRAGMA query_only = 1")
+            self.local.conn = conn
+        return conn
+
+    def _ler(self, sql, parametros=()):
+        return self._leitor().execute(sql, parametros).fetchall()
+
+    def _ler_tarefas(self, sql, parametros=()):
+        cursor = self._leitor().cursor()
+        cursor.row_factory = fabrica_tarefa
+        return cursor.execute(sql, parametros).fetchall()
+
+    def _escrever(self, funcao, em_transacao=True, aviso=None):
+        # Enfileira funcao(cursor) para o escritor e espera o commit do lote.
+        # em_transacao=False roda sozinha, fora de transação (VACUUM, checkpoint).
+        # aviso(resultado) -> (tipo, dados) ou None: publicado pelo próprio escritor logo após o
+        # commit, na ordem da fila, para que os assinantes vejam os avisos na ordem dos commits.
+        # O prazo evita que a interface trave para sempre se o escritor parar.
+        if not self.escritor.is_alive(): raise RuntimeError("o escritor do banco não está rodando")
+        futuro = Future()
+        self.fila_escrita.put((funcao, futuro, em_transacao, aviso))
+        return futuro.result(timeout=ESPERA_ESCRITA)
+
+    def _laco_escritor(self):
+        cursor = self.conn.cursor()
+        while True:
+            itens = [self.fila_escrita.get()]
+            while len(itens) < LOTE_ESCRITA and itens[-1] is not None:
+                try: itens.append(self.fila_escrita.get_nowait())
+                except queue.Empty: break
+            parar = itens[-1] is None
+            if parar: itens.pop()
+            lote = []
+            for funcao, futuro, em_transacao, aviso in itens:
+                if em_transacao:
+                    lote.append((funcao, futuro, aviso))
+                    continue
+                self._gravar_lote(cursor, lote)
+                lote = []
+                try: resultado, erro = funcao(cursor), None
+                except Exception as falha: resultado, erro = None, falha
+                self.invalidar_cache()
+                if erro: futuro.set_exception(erro)
+                else:
+                    self._avisar(aviso, resultado)
+                    futuro.set_result(resultado)
+            self._gravar_lote(cursor, lote)
+            if parar: return
+
+    def _gravar_lote(self, cursor, lote):
+        if not lote: return
+        resultados = []
+        try:
+            cursor.execute("BEGIN IMMEDIATE")
+            for funcao, futuro, aviso in lote:
+                # Um savepoint por escrita: se uma falhar, as outras do lote seguem
+                cursor.execute("SAVEPOINT escrita")
+                try:
+                    resultados.append((futuro, funcao(cursor), None, aviso))
+                    cursor.execute("RELEASE escrita")
+                except Exception as erro:
+                    cursor.execute("ROLLBACK TO escrita")
+                    cursor.execute("RELEASE escrita")
+                    resultados.append((futuro, None, erro, None))
+            cursor.execute("COMMIT")
+        except Exception as erro:
+            # Banco travado por outro processo além do timeout, ou falha no COMMIT: o lote todo falha
+            # e o escritor segue atendendo a fila
+            if self.conn.in_transaction:
+                try: cursor.execute("ROLLBACK")
+                except sqlite3.Error: log_manutencao.exception("falha ao desfazer o lote")
+            resultados = [(futuro, None, erro, None) for _, futuro, _ in lote]
+        self.invalidar_cache()
+        for futuro, valor, erro, aviso in resultados:
+            if erro: futuro.set_exception(erro)
+            else:
+                self._avisar(aviso, valor)
+                futuro.set_result(valor)
+
+    def _avisar(self, aviso, resultado):
+        try: evento = aviso(resultado) if aviso else None
+        except Exception:
+            log_avisos.exception("falha ao montar o aviso de uma escrita")
+            return
+        if evento: self._publicar(*evento)
+
+    def invalidar_cache(self):
+        with self.trava_cache:
+            self.cache_leitura.clear()
+            self.versao_cache += 1
+
+    def _em_cache(self, chave, carregar):
+        # Resultado compartilhado: quem recebe não deve alterar a lista devolvida
+        chave = (chave, date.today())  # derivados como atraso_dias mudam à meia-noite
+        with self.trava_cache:
+            versao_dados = (self.conn_versao.execute("PRAGMA main.data_version").fetchone()[0],
+                            self.conn_versao.execute("PRAGMA arquivo.data_version").fetchone()[0])
+            if versao_dados != self.versao_dados:
+                self.cache_leitura.clear()
+                self.versao_cache += 1
+                self.versao_dados = versao_dados
+            if chave in self.cache_leitura:
+                self.cache_leitura.move_to_end(chave)
+                return self.cache_leitura[chave]
+            versao = self.versao_cache
+        resultado = carregar()
+        with self.trava_cache:
+            if versao == self.versao_cache:
+                self.cache_leitura[chave] = resultado
+                if len(self.cache_leitura) > TAMANHO_CACHE_LEITURA: self.cache_leitura.popitem(last=False)
+        return resultado
+
+    # --- escrita ---
+    @staticmethod
+    def _inserir(cursor, titulo, responsavel, data_limite, recorrencia):
+        agora = datetime.now().strftime(FORMATO_DATA_HORA)
+        cursor.execute("""
+            INSERT INTO tarefas (titulo, status, responsavel, data_limite, data_criacao, data_conclusao, recorrencia) 
+            VALUES (?, ?, ?, ?, ?, ?, ?)""", 
+            (titulo, "pendente", responsavel, data_limite or None, agora, None, recorrencia)
+        )
+        return Tarefa(*cursor.execute("SELECT * FROM tarefas WHERE id = ?", (cursor.lastrowid,)).fetchone())
+
+    def adicionar(self, titulo, responsavel, data_limite, recorrencia):
+        return self._escrever(lambda cursor: self._inserir(cursor, titulo, responsavel, data_limite, recorrencia),
+                              aviso=lambda tarefa: ("salvas", [tarefa]))
+
+    def atualizar_status(self, id_tarefa, novo_status, recuperar_atrasadas=False):
+        # Retorna (tarefa atualizada, [ocorrências geradas pela recorrência])
+        if novo_status == "concluida":
+            tarefas, novas = self.concluir_varias([id_tarefa], recuperar_atrasadas)
+            return (tarefas[0] if tarefas else None), novas
+
+        def escrita(cursor):
+            cursor.execute("UPDATE tarefas SET status = ?, data_conclusao = NULL WHERE id = ?", (novo_status, id_tarefa))
+            linha = cursor.execute("SELECT * FROM tarefas WHERE id = ?", (id_tarefa,)).fetchone()
+            return Tarefa(*linha) if linha else None
+        return self._escrever(escrita, aviso=lambda tarefa: ("salvas", [tarefa]) if tarefa else None), []
+
+    def concluir_varias(self, ids, recuperar_atrasadas=False):
+        # Conclui as tarefas e cria as próximas ocorrências das recorrentes, tudo numa transação.
+        # Por padrão só a próxima que não esteja no passado; recuperar_atrasadas=True cria também
+        # as perdidas desde o prazo. Já concluídas não mudam nem geram de novo.
+        # Retorna ([tarefas concluídas], [ocorrências novas])
+        ids, agora = list(ids), datetime.now()
+        texto_agora = agora.strftime(FORMATO_DATA_HORA)
+
+        def escrita(cursor):
+            tarefas, abertas = [], []
+            for inicio in range(0, len(ids), LOTE_IDS):
+                parte = ids[inicio:inicio + LOTE_IDS]
+                marcas = ",".join("?" * len(parte))
+                abertas += [Tarefa(*linha) for linha in cursor.execute(
+                    f"SELECT * FROM tarefas WHERE id IN ({marcas}) AND status != 'concluida'", parte)]
+                cursor.execute(f"""
+                    UPDATE tarefas SET status = 'concluida', data_conclusao = ?
+                    WHERE id IN ({marcas}) AND status != 'concluida'""", [texto_agora, *parte])
+                tarefas += [Tarefa(*linha) for linha in cursor.execute(f"SELECT * FROM tarefas WHERE id IN ({marcas})", parte)]
+            linhas = [(t.titulo, "pendente", t.responsavel, data.isoformat(), texto_agora, None, t.recorrencia)
+                      for t, datas in proximas_ocorrencias(abertas, agora.date(), recuperar_atrasadas) for data in datas]
+            if not linhas: return tarefas, []
+            # Escritor único: tudo acima do maior id atual foi inserido agora
+            ultimo_id = cursor.execute("SELECT COALESCE(MAX(id), 0) FROM tarefas").fetchone()[0]
+            cursor.executemany("""
+                INSERT INTO tarefas (titulo, status, responsavel, data_limite, data_criacao, data_conclusao, recorrencia)
+                VALUES (?, ?, ?, ?, ?, ?, ?)""", linhas)
+            return tarefas, [Tarefa(*linha) for linha in cursor.execute("SELECT * FROM tarefas WHERE id > ? ORDER BY id", (ultimo_id,))]
+        return self._escrever(escrita, aviso=lambda r: ("salvas", r[0] + r[1]) if r[0] else None)
+
+    def excluir(self, id_tarefa):
+        # Retorna a linha removida
+        def escrita(cursor):
+            linha = cursor.execute("SELECT * FROM tarefas WHERE id = ?", (id_tarefa,)).fetchone()
+            cursor.execute("DELETE FROM tarefas WHERE id = ?", (id_tarefa,))
+            return Tarefa(*linha) if linha else None
+        return self._escrever(escrita, aviso=lambda tarefa: ("removidas", [tarefa.id]) if tarefa else None)
+
+    def recontar_estatisticas(self):
+        # Refaz o placar a partir de um GROUP BY completo (reparo; o normal é via triggers)
+        self._escrever(_recontar_responsaveis, aviso=lambda _: ("recarregar", None))
+
+    # --- arquivo e compactação ---
+    def arquivar(self, dias=DIAS_ARQUIVO, lote=LOTE_ARQUIVO):
+        # Move concluídas há mais de `dias` para o banco de arquivo, `lote` por transação,
+        # para que as escritas da interface entrem entre um lote e outro. Retorna quantas moveu.
+        corte = (datetime.now() - timedelta(days=dias)).strftime(FORMATO_DATA_HORA)
+        resp, *parcelas = _parcelas_contagem("t")
+        somas = ", ".join(f"SUM({p})" for p in parcelas)
+
+        # Um id que já existe no arquivo (ex.: banco principal recriado com o arquivo antigo ao lado)
+        # fica na tabela principal: o INSERT sem OR IGNORE garante que nada é apagado sem ter sido copiado
+        def mover(cursor):
+            ids = [linha[0] for linha in cursor.execute("""
+                SELECT id FROM tarefas WHERE status = 'concluida' AND data_conclusao < ?
+                AND NOT EXISTS (SELECT 1 FROM arquivo.tarefas a WHERE a.id = tarefas.id)
+                ORDER BY data_conclusao LIMIT ?""", (corte, lote))]
+            if not ids: return []
+            marcas = ",".join("?" * len(ids))
+            cursor.execute(f"INSERT INTO arquivo.tarefas SELECT * FROM tarefas WHERE id IN ({marcas})", ids)
+            cursor.execute(f"""
+                INSERT INTO arquivo.contagem_responsaveis (responsavel, total, pendentes, concluidas, no_prazo, atrasadas)
+                SELECT {resp}, {somas} FROM tarefas t WHERE id IN ({marcas}) GROUP BY {resp}
+                ON CONFLICT (responsavel) DO UPDATE SET
+                    total = total + excluded.total, pendentes = pendentes + excluded.pendentes,
+                    concluidas = concluidas + excluded.concluidas, no_prazo = no_prazo + excluded.no_prazo,
+                    atrasadas = atrasadas + excluded.atrasadas""", ids)
+            # Arquivar não é deixar de usar o nome: devolve o que o trigger responsaveis_ad vai descontar
+            cursor.execute(f"""
+                INSERT INTO responsaveis (nome, usos, ultimo_uso)
+                SELECT responsavel, COUNT(*), MAX(data_criacao) FROM tarefas
+                WHERE id IN ({marcas}) AND trim(COALESCE(responsavel, '')) != '' GROUP BY responsavel
+                ON CONFLICT (nome) DO UPDATE SET usos = usos + excluded.usos""", ids)
+            cursor.execute(f"DELETE FROM tarefas WHERE id IN ({marcas})", ids)
+            return ids
+
+        total = 0
+        while True:
+            movidas = self._escrever(mover, aviso=lambda ids: ("removidas", ids) if ids else None)
+            total += len(movidas)
+            if len(movidas) < lote: break
+        repetidas = self._ler("""
+            SELECT COUNT(*) FROM tarefas WHERE status = 'concluida' AND data_conclusao < ?
+            AND EXISTS (SELECT 1 FROM arquivo.tarefas a WHERE a.id = tarefas.id)""", (corte,))[0][0]
+        if repetidas: log_manutencao.warning("%d tarefas não foram arquivadas: o id já existe em %s", repetidas, self.caminho_arquivo)
+        return total
+
+    def compactar(self, paginas=PAGINAS_COMPACTACAO, converter=False):
+        # Devolve ao sistema as páginas livres dos dois arquivos, `paginas` por vez.
+        # Bancos criados antes do auto_vacuum incremental precisam de um VACUUM completo, que
+        # seguraria a fila de escrita (e a interface) do começo ao fim: só com converter=True,
+        # pela linha de comando (python banco.py compactar), nunca na manutenção do app.
+        liberadas = 0
+        for esquema in ("main", "arquivo"):
+            if self._ler(f"PRAGMA {esquema}.auto_vacuum")[0][0] != 2:
+                if not converter:
+                    log_manutencao.info("%s sem auto_vacuum incremental; rode 'python banco.py compactar' com o app fechado", esquema)
+                    continue
+                self._escrever(lambda c, e=esquema: (c.execute(f"PRAGMA {e}.auto_vacuum = INCREMENTAL"), c.execute(f"VACUUM {e}")), em_transacao=False)
+            while True:
+                livres = self._ler(f"PRAGMA {esquema}.freelist_count")[0][0]
+                if not livres: break
+                self._escrever(lambda c, e=esquema: c.execute(f"PRAGMA {e}.incremental_vacuum({paginas})").fetchall(), em_transacao=False)
+                liberadas += min(livres, paginas)
+        self._escrever(lambda c: c.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchall(), em_transacao=False)
+        return liberadas
+
+    def iniciar_manutencao(self, dias=DIAS_ARQUIVO):
+        # Arquiva e compacta numa thread própria; cada passo é uma escrita curta na fila
+        def manutencao():
+            try:
+                movidas = self.arquivar(dias)
+                liberadas = self.compactar()
+                log_manutencao.info("arquivadas %d tarefas, %d páginas liberadas", movidas, liberadas)
+            except Exception:
+                log_manutencao.exception("falha na manutenção do banco")
+        threading.Thread(target=manutencao, name="manutencao-db", daemon=True).start()
+
+    def iniciar_agenda(self):
+        # Alertas de prazo enquanto o app está aberto (ver AgendaPrazos)
+        if self.agenda is None:
+            self.agenda = AgendaPrazos(self)
+            self.agenda.iniciar()
+
+    # --- importação / exportação em massa ---
+    def importar(self, caminho, formato=None, lote=LOTE_IMPORTACAO):
+        # CSV (com cabeçalho) ou JSON Lines; lê em fluxo e grava em lotes de uma transação cada.
+        # Linhas inválidas são puladas e contadas. Retorna um resumo com a vazão.
+        formato = formato or _formato_pelo_nome(caminho)
+        inicio = time.perf_counter()
+        resumo = {"importadas": 0, "rejeitadas": 0, "erros": []}
+        agora = datetime.now().strftime(FORMATO_DATA_HORA)
+
+        def gravar(linhas):
+            self._escrever(lambda cursor: cursor.executemany("""
+                INSERT INTO tarefas (titulo, status, responsavel, data_limite, data_criacao, data_conclusao, recorrencia)
+                VALUES (?, ?, ?, ?, ?, ?, ?)""", linhas))
+            resumo["importadas"] += len(linhas)
+
+        # utf-8-sig: o CSV salvo pelo Excel começa com BOM, que grudaria no nome da primeira coluna
+        with open(caminho, newline="", encoding="utf-8-sig") as arquivo:
+            # JSON Lines é decodificado dentro do try: uma linha malformada só é rejeitada.
+            # Os erros citam a linha do arquivo (contando linhas em branco e quebras dentro de aspas no CSV)
+            if formato == "csv":
+                leitor = csv.DictReader(arquivo)
+                registros = ((leitor.line_num, registro) for registro in leitor)
+            else:
+                registros = ((numero, linha) for numero, linha in enumerate(arquivo, start=1) if linha.strip())
+            pendentes = []
+            for numero, registro in registros:
+                try:
+                    if formato != "csv": registro = json.loads(registro)
+                    pendentes.append(_validar_registro(registro, agora))
+                except (ValueError, TypeError, AttributeError) as erro:
+                    resumo["rejeitadas"] += 1
+                    if len(resumo["erros"]) < 20: resumo["erros"].append(f"linha {numero}: {erro}")
+                    continue
+                if len(pendentes) >= lote:
+                    gravar(pendentes)
+                    pendentes = []
+            if pendentes: gravar(pendentes)
+        # Um aviso só no fim, depois do último lote: escrita vazia que passa pela fila como as outras
+        if resumo["importadas"]: self._escrever(lambda cursor: None, aviso=lambda _: ("recarregar", None))
+
+        resumo["segundos"] = time.perf_counter() - inicio
+        resumo["linhas_por_segundo"] = resumo["importadas"] / resumo["segundos"] if resumo["segundos"] else 0.0
+        return resumo
+
+    def exportar(self, caminho, formato=None, status=None):
+        # Escreve direto do cursor, linha a linha, sem carregar a tabela inteira na memória
+        formato = formato or _formato_pelo_nome(caminho)
+        inicio = time.perf_counter()
+        sql, parametros = "SELECT * FROM tarefas", ()
+        if status: sql, parametros = sql + " WHERE status = ?", (status,)
+        total = 0
+        with open(caminho, "w", newline="", encoding="utf-8") as arquivo:
+            linhas = self._leitor().execute(sql + " ORDER BY id", parametros)
+            if formato == "csv":
+                escritor = csv.writer(arquivo)
+                escritor.writerow(COLUNAS)
+                for linha in linhas:
+                    escritor.writerow(["" if v is None else v for v in linha])
+                    total += 1
+            else:
+                for linha in linhas:
+                    arquivo.write(json.dumps(dict(zip(COLUNAS, linha)), ensure_ascii=False) + "\n")
+                    total += 1
+        segundos = time.perf_counter() - inicio
+        return {"exportadas": total, "segundos": segundos, "linhas_por_segundo": total / segundos if segundos else 0.0}
+
+    # --- leitura ---
+    def buscar_por_id(self, id_tarefa):
+        linhas = self._ler_tarefas("SELECT * FROM tarefas WHERE id = ?", (id_tarefa,))
+        return linhas[0] if linhas else None
+
+    def buscar_por_ids(self, ids):
+        ids, tarefas = list(ids), []
+        for inicio in range(0, len(ids), LOTE_IDS):
+            parte = ids[inicio:inicio + LOTE_IDS]
+            tarefas += self._ler_tarefas(f"SELECT * FROM tarefas WHERE id IN ({','.join('?' * len(parte))})", parte)
+        return tarefas
+
+    def listar_por_status(self, status):
+        return self._ler_tarefas("SELECT * FROM tarefas WHERE status = ?", (status,))
+    
+    def listar_pagina(self, status, apos_id=None, limite=TAMANHO_PAGINA, recentes_primeiro=False):
+        # Paginação por chave: continua a partir do último id já exibido, sem OFFSET.
+        # A primeira página (a que toda sessão abre) vem do cache compartilhado.
+        if apos_id is None:
+            return self._em_cache(("listar_pagina", status, limite, recentes_primeiro),
+                                  lambda: self._listar_pagina(status, None, limite, recentes_primeiro))
+        return self._listar_pagina(status, apos_id, limite, recentes_primeiro)
+
+    def _listar_pagina(self, status, apos_id, limite, recentes_primeiro):
+        if recentes_primeiro:
+            filtro, ordem = "id < ?", "DESC"
+            apos_id = apos_id if apos_id is not None else 2**63 - 1
+        else:
+            filtro, ordem = "id > ?", "ASC"
+            apos_id = apos_id if apos_id is not None else 0
+        return self._ler_tarefas(f"""
+            SELECT * FROM tarefas WHERE status = ? AND {filtro}
+            ORDER BY id {ordem} LIMIT ?""", (status, apos_id, limite))
+
+    def listar_todas(self):
+        return self._ler_tarefas("SELECT * FROM tarefas")
+
+    def buscar_tudo(self, termo, apos=None, limite=TAMANHO_PAGINA, incluir_arquivo=False):
+        # Cada palavra digitada vira um prefixo ("jo" acha "João"); todas precisam casar.
+        # Uma página por vez: pendentes primeiro, depois concluídas (e o arquivo), mais novas primeiro.
+        # apos é o marcador devolvido pela página anterior. Retorna (tarefas, marcador ou None no fim).
+        palavras = re.findall(r"\w+", termo.lower())
+        if not palavras: return [], None
+        consulta = " ".join(f'"{p}"*' for p in palavras)
+        if apos is None:
+            return self._em_cache(("buscar_tudo", consulta, limite, incluir_arquivo),
+                                  lambda: self._buscar_tudo(consulta, (0, None), limite, incluir_arquivo))
+        return self._buscar_tudo(consulta, apos, limite, incluir_arquivo)
+
+    def _buscar_tudo(self, consulta, apos, limite, incluir_arquivo):
+        # Percorre o índice FTS em ordem de rowid decrescente e para ao completar a página: o custo
+        # depende do tamanho da página, não de quantas linhas casam (ordenar por bm25 exigiria
+        # pontuar todas elas). O status é filtrado dentro do FTS, então poucas pendentes entre
+        # muitas concluídas não obrigam a percorrer as concluídas. O arquivo só tem concluídas
+        # (e arquivos antigos não têm a coluna status no índice): lá basta o texto.
+        fases = FASES_BUSCA if incluir_arquivo else FASES_BUSCA[:2]
+        fase, ultimo_id = apos
+        tarefas = []
+        while fase < len(fases) and len(tarefas) < limite:
+            esquema, status = fases[fase]
+            pedido = limite - len(tarefas)
+            filtro = f"{{titulo responsavel}} : ({consulta})" + (f" AND status : {status}" if esquema == "main" else "")
+            linhas = self._ler_tarefas(f"""
+                SELECT t.* FROM {esquema}.tarefas_busca b JOIN {esquema}.tarefas t ON t.id = b.rowid
+                WHERE b.tarefas_busca MATCH ? AND b.rowid < ?
+                ORDER BY b.rowid DESC LIMIT ?""", (filtro, 2**63 - 1 if ultimo_id is None else ultimo_id, pedido))
+            tarefas += linhas
+            if len(linhas) < pedido: fase, ultimo_id = fase + 1, None
+            else: ultimo_id = linhas[-1].id
+        return tarefas, ((fase, ultimo_id) if fase < len(fases) else None)
+
+    def estatisticas_por_responsavel(self, incluir_arquivo=False):
+        # (responsavel, total, pendentes, concluidas, no_prazo, atrasadas) por pessoa
+        return self._em_cache(("estatisticas", incluir_arquivo), lambda: self._estatisticas(incluir_arquivo))
+
+    def _estatisticas(self, incluir_arquivo):
+        if not incluir_arquivo:
+            return self._ler("""
+                SELECT responsavel, total, pendentes, concluidas, no_prazo, atrasadas
+                FROM contagem_responsaveis WHERE total > 0 ORDER BY responsavel""")
+        return self._ler("""
+            SELECT responsavel, SUM(total), SUM(pendentes), SUM(concluidas), SUM(no_prazo), SUM(atrasadas)
+            FROM (SELECT * FROM main.contagem_responsaveis UNION ALL SELECT * FROM arquivo.contagem_responsaveis)
+            GROUP BY responsavel HAVING SUM(total) > 0 ORDER BY responsavel""")
+
+    def listar_nomes_usados(self):
+        # Do mais para o menos usado
+        return self._indice_nomes().mais_usados
+
+    def sugerir_responsaveis(self, prefixo, limite=LIMITE_SUGESTOES):
+        return self._indice_nomes().sugerir(prefixo, limite)
+
+    def _indice_nomes(self):
+        return self._em_cache("indice_nomes", lambda: IndiceNomes(self._ler("SELECT nome, usos, ultimo_uso FROM responsaveis WHERE usos > 0")))
+
+    def buscar_alertas_reais(self):
+        # Pendentes vencendo hoje, amanhã ou já atrasadas (NULL fica fora do intervalo)
+        amanha = (datetime.now().date() + timedelta(days=1)).strftime(FORMATO_DATA)
+        return self._em_cache("alertas", lambda: self._ler_tarefas("""
+            SELECT * FROM tarefas WHERE status = 'pendente' AND data_limite <= ?
+            ORDER BY data_limite""", (amanha,)))
+
+class AgendaPrazos:
+    # Pendentes com prazo num heap ordenado pelo dia em que mudam de situação: na véspera
+    # entram no alerta ("vence amanhã") e no dia seguinte ao prazo ficam atrasadas. Todo
+    # prazo é uma data, então a thread só acorda na meia-noite do primeiro evento. Carregada
+    # uma vez; depois segue os avisos do banco. Entradas antigas do heap ficam lá até saírem
+    # no topo e são ignoradas (vigentes guarda o número da entrada válida de cada tarefa).
+    def __init__(self, db):
+        self.db = db
+        self.heap = []
+        self.vigentes = {}
+        self.numero = 0
+        self.parado = False
+        self.condicao = threading.Condition()
+
+    def iniciar(self):
+        self.db.assinar(self._mudancas)
+        with self.condicao: self._carregar()
+        threading.Thread(target=self._laco, name="agenda-prazos", daemon=True).start()
+
+    def parar(self):
+        self.db.cancelar_assinatura(self._mudancas)
+        with self.condicao:
+            self.parado = True
+            self.condicao.notify()
+
+    def _carregar(self):
+        # Atrasadas não mudam mais de situação e ficam de fora
+        hoje = date.today()
+        self.heap, self.vigentes = [], {}
+        for id_t, limite in self.db._ler("""
+                SELECT id, data_limite FROM tarefas WHERE status = 'pendente' AND data_limite >= ?""", (hoje.isoformat(),)):
+            self._agendar(id_t, _ler_data(limite), hoje)
+
+    @staticmethod
+    def _proximo_evento(limite, hoje):
+        if (limite - hoje).days > 1: return limite - timedelta(days=1)
+        if limite >= hoje: return limite + timedelta(days=1)
+        return None
+
+    def _agendar(self, id_t, limite, hoje):
+        # limite=None tira a tarefa da agenda
+        self.vigentes.pop(id_t, None)
+        evento = self._proximo_evento(limite, hoje) if limite else None
+        if evento is None: return
+        self.numero += 1
+        self.vigentes[id_t] = self.numero
+        heappush(self.heap, (evento, self.numero, id_t, limite))
+
+    def _mudancas(self, tipo, dados):
+        if tipo == "prazos": return
+        hoje = date.today()
+        with self.condicao:
+            if tipo == "recarregar": self._carregar()
+            elif tipo == "removidas":
+                for id_t in dados: self.vigentes.pop(id_t, None)
+            else:
+                for t in dados: self._agendar(t.id, t.data_limite if t.status == "pendente" else None, hoje)
+            if len(self.heap) > 2 * len(self.vigentes) + 64:
+                self.heap = [e for e in self.heap if self.vigentes.get(e[2]) == e[1]]
+                heapify(self.heap)
+            self.condicao.notify()
+
+    def _laco(self):
+        while True:
+            with self.condicao:
+                while True:
+                    if self.parado: return
+                    while self.heap and self.vigentes.get(self.heap[0][2]) != self.heap[0][1]: heappop(self.heap)
+                    hoje = date.today()
+                    if self.heap and self.heap[0][0] <= hoje: break
+                    espera = ESPERA_MAXIMA_AGENDA
+                    if self.heap: espera = min(espera, (datetime.combine(self.heap[0][0], datetime.min.time()) - datetime.now()).total_seconds())
+                    self.condicao.wait(max(espera, 0.1))
+                mudaram = []
+                while self.heap and self.heap[0][0] <= hoje:
+                    _, numero, id_t, limite = heappop(self.heap)
+                    if self.vigentes.get(id_t) != numero: continue
+                    mudaram.append(id_t)
+                    self._agendar(id_t, limite, hoje)
+            # Lê só as que mudaram, já com atraso_dias de hoje; concluídas nesse meio-tempo ficam de fora
+            tarefas = [t for t in self.db.buscar_por_ids(mudaram) if t.status == "pendente"]
+            if tarefas: self.db._publicar("prazos", tarefas)
+
+def _formato_pelo_nome(caminho):
+    return "csv" if caminho.lower().endswith(".csv") else "jsonl"
+
+def _validar_registro(registro, agora):
+    # Registro de importação -> tupla pronta para o INSERT (sem id: o banco gera um novo)
+    titulo = (registro.get("titulo") or "").strip()
+    if not titulo: raise ValueError("titulo vazio")
+    status = (registro.get("status") or "pendente").strip()
+    if status not in STATUS_VALIDOS: raise ValueError(f"status inválido: {status!r}")
+    conclusao = normalizar_data(registro.get("data_conclusao"), com_hora=True)
+    if status == "concluida" and not conclusao: conclusao = agora
+    if status == "pendente": conclusao = None
+    return (titulo, status, (registro.get("responsavel") or "Geral").strip(),
+            normalizar_data(registro.get("data_limite")),
+            normalizar_data(registro.get("data_criacao"), com_hora=True) or agora,
+            conclusao, (registro.get("recorrencia") or "Não repete").strip())
+
+if __name__ == "__main__":
+    # Uso sem interface: python banco.py importar tarefas.csv | python banco.py exportar saida.jsonl
+    # | python banco.py compactar (converte bancos antigos para auto_vacuum incremental; app fechado)
+    import argparse
+    parser = argparse.ArgumentParser(description="Importa/exporta tarefas em massa (CSV ou JSON Lines) e compacta o banco.")
+    parser.add_argument("acao", choices=("importar", "exportar", "compactar"))
+    parser.add_argument("arquivo", nargs="?")
+    parser.add_argument("--banco", default="banco_tarefas_v8.db")
+    parser.add_argument("--formato", choices=("csv", "jsonl"))
+    parser.add_argument("--status", choices=STATUS_VALIDOS, help="só exporta tarefas com este status")
+    args = parser.parse_args()
+    if args.acao != "compactar" and not args.arquivo: parser.error(f"{args.acao} precisa do arquivo")
+    db = Database(args.banco)
+    if args.acao == "compactar":
+        print(f"{db.compactar(converter=True)} páginas liberadas")
+    elif args.acao == "importar":
+        resumo = db.importar(args.arquivo, args.formato)
+        print(f"{resumo['importadas']} importadas, {resumo['rejeitadas']} rejeitadas em {resumo['segundos']:.2f}s ({resumo['linhas_por_segundo']:.0f} linhas/s)")
+        for erro in resumo["erros"]: print("  " + erro)
+    else:
+        resumo = db.exportar(args.arquivo, args.formato, args.status)
+        print(f"{resumo['exportadas']} exportadas em {resumo['segundos']:.2f}s ({resumo['linhas_por_segundo']:.0f} linhas/s)")
+    db.fechar()
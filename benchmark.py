@@ -0,0 +1,169 @@
+# Benchmark sem interface da camada de dados e da montagem de cards.
+#
+#   python benchmark.py                              # 1k, 100k e 1M tarefas
+#   python benchmark.py --tamanhos 1000 --saida hoje.json
+#   python benchmark.py --comparar ontem.json        # sai com código 1 se algo piorou
+#
+# Os bancos sintéticos ficam em --pasta e são reaproveitados entre execuções.
+import argparse
+import json
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+from banco import Database, FORMATO_DATA, FORMATO_DATA_HORA
+
+NOMES = [f"Pessoa {i}" for i in range(50)]
+PALAVRAS = ["relatório", "ação", "reunião", "compras", "limpeza", "orçamento", "revisão", "entrega", "ligação", "manutenção"]
+RECORRENCIAS = ["Não repete"] * 8 + ["Diária", "Semanal", "Mensal", "Anual"]
+
+def gerar_banco(caminho, total, semente=42):
+    # Metade pendente, metade concluída, prazos espalhados em ±60 dias a partir de hoje
+    if os.path.exists(caminho): return Database(caminho)
+    aleatorio = random.Random(semente)
+    db = Database(caminho)
+    hoje = datetime.now()
+    lote = []
+    for i in range(total):
+        criacao = hoje - timedelta(days=aleatorio.randint(0, 365))
+        limite = (hoje + timedelta(days=aleatorio.randint(-60, 60))).strftime(FORMATO_DATA) if aleatorio.random() < 0.8 else None
+        concluida = aleatorio.random() < 0.5
+        conclusao = (criacao + timedelta(days=aleatorio.randint(0, 90))).strftime(FORMATO_DATA_HORA) if concluida else None
+        titulo = f"{aleatorio.choice(PALAVRAS)} {aleatorio.choice(PALAVRAS)} {i}"
+        lote.append((titulo, "concluida" if concluida else "pendente", aleatorio.choice(NOMES), limite,
+                     criacao.strftime(FORMATO_DATA_HORA), conclusao, aleatorio.choice(RECORRENCIAS)))
+        if len(lote) >= 10000 or i == total - 1:
+            db._escrever(lambda cursor, linhas=lote: cursor.executemany("""
+                INSERT INTO tarefas (titulo, status, responsavel, data_limite, data_criacao, data_conclusao, recorrencia)
+                VALUES (?, ?, ?, ?, ?, ?, ?)""", linhas))
+            lote = []
+    return db
+
+def cronometrar(funcao, repeticoes, preparar=None):
+    tempos = []
+    for i in range(repeticoes):
+        argumento = preparar(i) if preparar else None
+        inicio = time.perf_counter()
+        funcao(argumento) if preparar else funcao()
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    return {"mediana_ms": statistics.median(tempos), "min_ms": min(tempos), "max_ms": max(tempos), "repeticoes": repeticoes}
+
+def medir_banco(db, repeticoes):
+    resultados = {}
+    termos = ["rel", "ação", "pessoa 1", "manut entrega", "acao"]
+
+    # Antes de cada repetição o cache compartilhado é descartado: mede o banco, não o cache
+    def sem_cache(i): db.invalidar_cache()
+
+    def buscar(i):
+        db.invalidar_cache()
+        return termos[i % len(termos)]
+
+    resultados["listar_por_status"] = cronometrar(lambda: db.listar_por_status("pendente"), max(1, repeticoes // 5))
+    resultados["listar_pagina"] = cronometrar(lambda _: db.listar_pagina("concluida", recentes_primeiro=True), repeticoes, preparar=sem_cache)
+    resultados["buscar_tudo"] = cronometrar(db.buscar_tudo, repeticoes, preparar=buscar)
+    resultados["buscar_alertas_reais"] = cronometrar(lambda _: db.buscar_alertas_reais(), repeticoes, preparar=sem_cache)
+    resultados["listar_nomes_usados"] = cronometrar(lambda _: db.listar_nomes_usados(), repeticoes, preparar=sem_cache)
+    resultados["sugerir_responsaveis"] = cronometrar(lambda: db.sugerir_responsaveis("pessoa 1"), repeticoes)
+    resultados["estatisticas_por_responsavel"] = cronometrar(lambda _: db.estatisticas_por_responsavel(), repeticoes, preparar=sem_cache)
+
+    # Conclui tarefas recorrentes diferentes a cada repetição (inclui gerar a próxima ocorrência)
+    recorrentes = [linha[0] for linha in db._ler(
+        "SELECT id FROM tarefas WHERE status = 'pendente' AND recorrencia != 'Não repete' AND data_limite IS NOT NULL LIMIT ?",
+        (repeticoes * 101,))]
+    if recorrentes[:repeticoes]:
+        resultados["atualizar_status"] = cronometrar(lambda id_t: db.atualizar_status(id_t, "concluida"),
+                                                     len(recorrentes[:repeticoes]), preparar=lambda i: recorrentes[i])
+    # Lotes de 100 numa só transação, recuperando as ocorrências perdidas
+    lotes = [recorrentes[i:i + 100] for i in range(repeticoes, len(recorrentes), 100) if len(recorrentes[i:i + 100]) == 100]
+    if lotes:
+        resultados["concluir_varias_100"] = cronometrar(lambda ids: db.concluir_varias(ids, recuperar_atrasadas=True),
+                                                        len(lotes), preparar=lambda i: lotes[i])
+
+    # Busca com poucas pendentes entre muitas concluídas: conclui as de uma pessoa, menos duas
+    db._escrever(lambda cursor: cursor.execute("""
+        UPDATE tarefas SET status = 'concluida', data_conclusao = ?
+        WHERE status = 'pendente' AND responsavel = 'Pessoa 7'
+          AND id NOT IN (SELECT id FROM tarefas WHERE status = 'pendente' AND responsavel = 'Pessoa 7' LIMIT 2)""",
+        (datetime.now().strftime(FORMATO_DATA_HORA),)))
+    resultados["buscar_tudo_poucas_pendentes"] = cronometrar(lambda _: db.buscar_tudo("pessoa 7"), repeticoes, preparar=sem_cache)
+    return resultados
+
+def medir_cards(db, quantidade=1000):
+    # Custo por linha de montar_card (datas + árvore de controles Flet); pulado se o Flet não estiver instalado
+    try:
+        import main
+    except ImportError:
+        return None
+
+    class PaginaFalsa:
+        def update(self, *controles): pass
+
+    linhas = db.listar_pagina("pendente", limite=quantidade // 2) + db.listar_pagina("concluida", limite=quantidade // 2)
+    pagina, nada = PaginaFalsa(), lambda *args: None
+    inicio = time.perf_counter()
+    for tarefa in linhas: main.montar_card(pagina, tarefa, nada, nada)
+    total_ms = (time.perf_counter() - inicio) * 1000
+    return {"por_linha_us": total_ms * 1000 / max(1, len(linhas)), "linhas": len(linhas)}
+
+def comparar(atual, anterior, tolerancia):
+    # Lista operações cuja mediana piorou mais que a tolerância (ex.: 0.2 = 20%)
+    pioras = []
+    for tamanho, operacoes in atual["resultados"].items():
+        for nome, medida in operacoes.items():
+            antes = anterior.get("resultados", {}).get(tamanho, {}).get(nome)
+            if not antes or not medida: continue
+            chave = "por_linha_us" if "por_linha_us" in medida else "mediana_ms"
+            if antes.get(chave) and medida[chave] > antes[chave] * (1 + tolerancia):
+                pioras.append(f"{tamanho} {nome}: {antes[chave]:.3f} -> {medida[chave]:.3f} ({chave})")
+    return pioras
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark da camada de dados e da montagem de cards.")
+    parser.add_argument("--tamanhos", type=int, nargs="+", default=[1000, 100000, 1000000])
+    parser.add_argument("--repeticoes", type=int, default=20)
+    parser.add_argument("--pasta", default="bench_bancos")
+    parser.add_argument("--saida", default="bench_resultados.json")
+    parser.add_argument("--comparar", help="JSON de uma execução anterior")
+    parser.add_argument("--tolerancia", type=float, default=0.2)
+    args = parser.parse_args()
+
+    os.makedirs(args.pasta, exist_ok=True)
+    relatorio = {"quando": datetime.now().isoformat(timespec="seconds"), "python": platform.python_version(),
+                 "sqlite": sqlite3.sqlite_version, "resultados": {}}
+    for tamanho in args.tamanhos:
+        inicio = time.perf_counter()
+        # Cópia descartável: atualizar_status altera o banco e as rodadas seguintes devem partir do mesmo estado
+        base = os.path.join(args.pasta, f"tarefas_{tamanho}.db")
+        gerar_banco(base, tamanho).fechar()
+        copia = os.path.join(args.pasta, f"tarefas_{tamanho}_rodada.db")
+        for sufixo in ("", "-wal", "-shm"):
+            if os.path.exists(copia + sufixo): os.remove(copia + sufixo)
+        origem = sqlite3.connect(base)
+        with sqlite3.connect(copia) as destino: origem.backup(destino)
+        origem.close()
+        print(f"{tamanho} tarefas: banco pronto em {time.perf_counter() - inicio:.1f}s", file=sys.stderr)
+
+        db = Database(copia)
+        medidas = medir_banco(db, args.repeticoes)
+        cards = medir_cards(db)
+        if cards: medidas["montar_card"] = cards
+        db.fechar()
+        relatorio["resultados"][str(tamanho)] = medidas
+        for nome, medida in medidas.items():
+            valor = f"{medida['por_linha_us']:.1f} µs/linha" if "por_linha_us" in medida else f"{medida['mediana_ms']:.3f} ms"
+            print(f"  {nome:30} {valor}", file=sys.stderr)
+
+    with open(args.saida, "w", encoding="utf-8") as arquivo: json.dump(relatorio, arquivo, indent=2, ensure_ascii=False)
+    print(f"resultados em {args.saida}", file=sys.stderr)
+
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as arquivo: anterior = json.load(arquivo)
+        pioras = comparar(relatorio, anterior, args.tolerancia)
+        for piora in pioras: print("PIOROU " + piora, file=sys.stderr)
+        sys.exit(1 if pioras else 0)
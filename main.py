@@ -1,120 +1,69 @@
+import time
+INICIO_PROCESSO = time.perf_counter()
 import flet as ft
-import sqlite3
-from datetime import datetime, timedelta
-import calendar
+import threading
+import queue
+import atexit
+import logging
+import medicao
+from medicao import medir
+from banco import Database, formatar_data, FORMATO_DATA, TAMANHO_PAGINA
 
-# --- 1. BANCO DE DADOS ---
-class Database:
-    def __init__(self):
-        self.conn = sqlite3.connect("banco_tarefas_v8.db", check_same_thread=False)
-        self.cursor = self.conn.cursor()
-        self.criar_tabela()
-
-    def criar_tabela(self):
-        self.cursor.execute("""
-            CREATE TABLE IF NOT EXISTS tarefas (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                titulo TEXT,
-                status TEXT,
-                responsavel TEXT,
-                data_limite TEXT,
-                data_criacao TEXT,
-                data_conclusao TEXT,
-                recorrencia TEXT
-            )
-        """)
-        self.conn.commit()
-
-    def adicionar(self, titulo, responsavel, data_limite, recorrencia):
-        agora = datetime.now().strftime("%d/%m/%Y %H:%M")
-        self.cursor.execute("""
-            INSERT INTO tarefas (titulo, status, responsavel, data_limite, data_criacao, data_conclusao, recorrencia) 
-            VALUES (?, ?, ?, ?, ?, ?, ?)""", 
-            (titulo, "pendente", responsavel, data_limite, agora, "", recorrencia)
-        )
-        self.conn.commit()
+ESPERA_BUSCA = 0.25  # segundos sem digitar antes de pesquisar
 
-    def listar_por_status(self, status):
-        self.cursor.execute("SELECT * FROM tarefas WHERE status = ?", (status,))
-        return self.cursor.fetchall()
-    
-    def listar_todas(self):
-        self.cursor.execute("SELECT * FROM tarefas")
-        return self.cursor.fetchall()
-
-    def buscar_tudo(self, termo):
-        termo = f"%{termo.lower()}%"
-        query = """
-            SELECT * FROM tarefas 
-            WHERE LOWER(responsavel) LIKE ? OR LOWER(titulo) LIKE ?
-            ORDER BY 
-                CASE WHEN status = 'pendente' THEN 0 ELSE 1 END ASC,
-                id DESC
-        """
-        self.cursor.execute(query, (termo, termo))
-        return self.cursor.fetchall()
-    
-    def listar_nomes_usados(self):
-        self.cursor.execute("SELECT DISTINCT responsavel FROM tarefas")
-        return [row[0] for row in self.cursor.fetchall() if row[0]]
+log_inicio = logging.getLogger("tarefas.inicio")
 
-    def buscar_alertas_reais(self):
-        self.cursor.execute("SELECT * FROM tarefas WHERE status = 'pendente'")
-        todas_pendentes = self.cursor.fetchall()
-        
-        alertas = []
-        hoje = datetime.now().date()
-        amanha = hoje + timedelta(days=1)
-        
-        for t in todas_pendentes:
-            data_str = t[4] 
-            if data_str:
-                try:
-                    dt_tarefa = datetime.strptime(data_str, "%d/%m/%Y").date()
-                    if dt_tarefa <= amanha:
-                        alertas.append(t)
-                except:
-                    pass 
-        return alertas
-
-    def atualizar_status(self, id_tarefa, novo_status):
-        data_fim = datetime.now().strftime("%d/%m/%Y %H:%M") if novo_status == "concluida" else ""
-        self.cursor.execute("""
-            UPDATE tarefas SET status = ?, data_conclusao = ? WHERE id = ?""", 
-            (novo_status, data_fim, id_tarefa)
-        )
-        self.conn.commit()
-
-        if novo_status == "concluida":
-            self.cursor.execute("SELECT * FROM tarefas WHERE id = ?", (id_tarefa,))
-            tarefa = self.cursor.fetchone()
-            recorrencia = tarefa[7]
-            data_limite_str = tarefa[4]
-
-            if recorrencia and recorrencia != "Não repete" and data_limite_str:
-                try:
-                    dt_atual = datetime.strptime(data_limite_str, "%d/%m/%Y")
-                    nova_data = None
-                    if recorrencia == "Diária": nova_data = dt_atual + timedelta(days=1)
-                    elif recorrencia == "Semanal": nova_data = dt_atual + timedelta(weeks=1)
-                    elif recorrencia == "Mensal":
-                        mes = dt_atual.month % 12 + 1
-                        ano = dt_atual.year + (dt_atual.month // 12)
-                        dia = min(dt_atual.day, calendar.monthrange(ano, mes)[1])
-                        nova_data = dt_atual.replace(year=ano, month=mes, day=dia)
-                    elif recorrencia == "Anual": nova_data = dt_atual.replace(year=dt_atual.year + 1)
-
-                    if nova_data:
-                        self.adicionar(tarefa[1], tarefa[3], nova_data.strftime("%d/%m/%Y"), recorrencia)
-                except: pass
-
-    def excluir(self, id_tarefa):
-        self.cursor.execute("DELETE FROM tarefas WHERE id = ?", (id_tarefa,))
-        self.conn.commit()
-
-db = Database()
+# --- 1. BANCO DE DADOS ---
+# Criado só ao rodar o app, para que importar este módulo (ex.: benchmark.py) não abra o banco.
+# Abre em segundo plano enquanto a janela sobe; main() só espera por ele depois de pintar a tela.
+db = None
+erro_banco = None
+banco_pronto = threading.Event()
+
+def abrir_banco():
+    # Sinaliza banco_pronto mesmo se abrir/migrar falhar; main() mostra erro_banco na tela
+    global db, erro_banco
+    try:
+        db = Database()
+    except Exception as erro:
+        logging.exception("falha ao abrir o banco")
+        erro_banco = erro
+        return
+    finally:
+        banco_pronto.set()
+    db.iniciar_manutencao()
+    db.iniciar_agenda()
 
 # --- 2. FRONTEND ---
+def montar_card(page, tarefa, ao_marcar, ao_excluir):
+    # Monta o card de uma Tarefa; ao_marcar(card, marcado) e ao_excluir(card) tratam as ações no banco
+    feito = tarefa.concluida
+    cor_fundo, texto_extra, cor_texto_prazo, cor_destaque = "#F5F5F5", "", "grey", "grey"
+    texto_info = f"👤 {tarefa.responsavel}"
+    if tarefa.data_criacao:
+        texto_info += f" | Criado: {formatar_data(tarefa.data_criacao)}"
+        if tarefa.recorrencia and tarefa.recorrencia != "Não repete": texto_info += f" | 🔄 {tarefa.recorrencia}"
+        if tarefa.data_limite:
+            texto_info += f" | 🎯 {formatar_data(tarefa.data_limite)}"
+            if feito and tarefa.data_conclusao:
+                texto_info += f" | ✅ Em: {formatar_data(tarefa.data_conclusao)}"
+                if tarefa.no_prazo: texto_extra, cor_destaque = "👏 Em dia", "green"
+                else: texto_extra, cor_destaque = f"⚠️ Atrasou {tarefa.atraso_dias} dias", "red"
+            elif not feito and tarefa.atraso_dias:
+                cor_fundo, cor_texto_prazo, cor_destaque = "#FFCDD2", "red", "red"
+                texto_extra = f"⚠️ {tarefa.atraso_dias} dias de atraso"
+
+    painel_card = ft.Container(padding=10, bgcolor=cor_fundo, border_radius=8, margin=ft.margin.only(bottom=10), data=tarefa.id)
+    def cancelar_exclusao(e):
+        painel_card.content = layout_normal
+        painel_card.bgcolor = cor_fundo
+        page.update()
+    
+    layout_confirmacao = ft.Column([ft.Text("Apagar tarefa?", color="red", weight="bold", size=12), ft.Row([ft.ElevatedButton("Não", on_click=cancelar_exclusao, height=30), ft.ElevatedButton("Sim", on_click=lambda e: ao_excluir(painel_card), bgcolor="red", color="white", height=30)], alignment="end")])
+    layout_normal = ft.Column([ft.Row([ft.Checkbox(label=tarefa.titulo, value=feito, on_change=lambda e: ao_marcar(painel_card, e.control.value)), ft.TextButton("X", on_click=lambda e: setattr(painel_card, 'content', layout_confirmacao) or setattr(painel_card, 'bgcolor', '#FFEBEE') or page.update(), style=ft.ButtonStyle(color="red"))], alignment="spaceBetween"), ft.Row([ft.Text(texto_info, size=11, color=cor_texto_prazo), ft.Text(texto_extra, size=11, weight="bold", color=cor_destaque)], alignment="spaceBetween")])
+    painel_card.content = layout_normal
+    return painel_card
+
 def main(page: ft.Page):
     page.title = "Tarefas do dia a dia"
     page.bgcolor = "white"
@@ -123,8 +72,19 @@ def main(page: ft.Page):
     page.window_height = 800
     page.padding = 0
     page.vertical_alignment = "start"
+    page.update = medicao.contar("page.update", page.update)
+    inicio_sessao = time.perf_counter()
 
     data_selecionada_temp = [None] 
+    # Busca digitada: fila da thread de busca e número da busca mais recente (as antigas são descartadas)
+    fila_busca = queue.Queue()
+    geracao_busca = [0]
+    # Estado da paginação de cada aba: último id exibido, se acabou e se já foi aberta
+    paginas = {s: {"ultimo_id": None, "fim": False, "carregada": False, "carregando": False} for s in ("pendente", "concluida")}
+    # Busca exibida: termo e marcador da próxima página (None quando acabou)
+    busca = {"termo": None, "proximo": None}
+    # Handlers e a thread de avisos do banco mexem nas mesmas listas de cards: uma alteração por vez
+    trava_tela = threading.RLock()
 
     coluna_abas = ft.Column()
     lista_pendentes = ft.Column()
@@ -170,8 +130,9 @@ def main(page: ft.Page):
     
     fundo_escuro.content = janela_alerta
 
-    def verificar_urgencia():
-        urgentes = db.buscar_alertas_reais()
+    def verificar_urgencia(urgentes=None):
+        # Sem lista: todas as pendentes em alerta (ao abrir); com lista: as que a agenda acabou de avisar
+        if urgentes is None: urgentes = db.buscar_alertas_reais()
         if urgentes:
             conteudo_alerta.controls.clear()
             qtd = len(urgentes)
@@ -186,7 +147,7 @@ def main(page: ft.Page):
                         padding=5, 
                         bgcolor="#FFEBEE", 
                         border_radius=5,
-                        content=ft.Text(f"• {t[1]} ({t[4]})", color="black", weight="bold")
+                        content=ft.Text(f"• {t.titulo} ({formatar_data(t.data_limite)})", color="black", weight="bold")
                     )
                 )
             
@@ -199,9 +160,8 @@ def main(page: ft.Page):
     # --- CALENDÁRIO ---
     def data_mudou(e):
         if date_picker.value:
-            data_formatada = date_picker.value.strftime("%d/%m/%Y")
-            data_selecionada_temp[0] = data_formatada
-            btn_calendario.text = data_formatada
+            data_selecionada_temp[0] = date_picker.value.strftime(FORMATO_DATA)
+            btn_calendario.text = date_picker.value.strftime("%d/%m/%Y")
             btn_calendario.bgcolor = "#E3F2FD"
             btn_calendario.icon = ft.Icons.CHECK_CIRCLE
             page.update()
@@ -215,18 +175,13 @@ def main(page: ft.Page):
     # --- GRÁFICOS & RELATÓRIOS ---
     def gerar_relatorio():
         area_estatisticas.controls.clear()
-        todas = db.listar_todas()
-        placar = {}
-        for t in todas:
-            resp = t[3]
-            status = t[2]
-            if resp not in placar: placar[resp] = {"total": 0, "concluidas": 0}
-            placar[resp]["total"] += 1
-            if status == "concluida": placar[resp]["concluidas"] += 1
+        placar = db.estatisticas_por_responsavel(incluir_arquivo=True)
         area_estatisticas.controls.append(ft.Text("Resumo Geral:", size=20, weight="bold", color="black"))
         if not placar: area_estatisticas.controls.append(ft.Text("Nenhuma tarefa criada.", color="grey"))
-        for nome, dados in placar.items():
-            area_estatisticas.controls.append(ft.Container(padding=10, bgcolor="#F0F0F0", border_radius=10, margin=ft.margin.only(bottom=5), content=ft.Row([ft.Text(f"👤 {nome}", weight="bold", size=16, color="black"), ft.Text(f"Total: {dados['total']} | ✅ {dados['concluidas']}", color="grey")], alignment="spaceBetween")))
+        for nome, total, pendentes, concluidas, no_prazo, atrasadas in placar:
+            texto = f"Total: {total} | ✅ {concluidas}"
+            if no_prazo + atrasadas: texto += f" | 👏 {round(100 * no_prazo / (no_prazo + atrasadas))}% em dia"
+            area_estatisticas.controls.append(ft.Container(padding=10, bgcolor="#F0F0F0", border_radius=10, margin=ft.margin.only(bottom=5), content=ft.Row([ft.Text(f"👤 {nome}", weight="bold", size=16, color="black"), ft.Text(texto, color="grey")], alignment="spaceBetween")))
         page.update()
 
     def gerar_graficos():
@@ -235,22 +190,16 @@ def main(page: ft.Page):
             area_graficos.controls.append(ft.Container(padding=20, bgcolor="#FFEBEE", border_radius=10, content=ft.Column([ft.Text("⚠️ Aviso", weight="bold", color="red"), ft.Text("Versão PC antiga. No celular funcionará!")])))
             page.update()
             return
-        todas = db.listar_todas()
-        if not todas:
+        placar = db.estatisticas_por_responsavel(incluir_arquivo=True)
+        if not placar:
             area_graficos.controls.append(ft.Text("Sem dados.", italic=True))
             page.update()
             return
         
-        dados_pessoa = {}
-        for t in todas:
-            status, resp = t[2], t[3]
-            if resp not in dados_pessoa: dados_pessoa[resp] = {"pend": 0, "conc": 0}
-            if status == "pendente": dados_pessoa[resp]["pend"] += 1
-            else: dados_pessoa[resp]["conc"] += 1
         grupos, eixo_x, i, max_y = [], [], 0, 0
-        for nome, qtds in dados_pessoa.items():
-            if (qtds["pend"]+qtds["conc"]) > max_y: max_y = qtds["pend"]+qtds["conc"]
-            grupos.append(ft.BarChartGroup(x=i, bar_rods=[ft.BarChartRod(from_y=0, to_y=qtds["pend"], width=15, color="red"), ft.BarChartRod(from_y=0, to_y=qtds["conc"], width=15, color="green")]))
+        for nome, total, pendentes, *_ in placar:
+            if total > max_y: max_y = total
+            grupos.append(ft.BarChartGroup(x=i, bar_rods=[ft.BarChartRod(from_y=0, to_y=pendentes, width=15, color="red"), ft.BarChartRod(from_y=0, to_y=total - pendentes, width=15, color="green")]))
             eixo_x.append(ft.ChartAxisLabel(value=i, label=ft.Text(nome[:4], size=10)))
             i+=1
         grafico = ft.BarChart(bar_groups=grupos, bottom_axis=ft.ChartAxis(labels=eixo_x), left_axis=ft.ChartAxis(labels_size=40), border=ft.border.all(1, "grey"), height=200, max_y=max_y + 2)
@@ -259,6 +208,7 @@ def main(page: ft.Page):
         page.update()
 
     # --- NAVEGAÇÃO ---
+    @medir("ui.navegar")
     def navegar(e):
         if isinstance(e, str): tela = e
         else: tela = e.control.data 
@@ -274,6 +224,7 @@ def main(page: ft.Page):
             lista_pendentes.visible = True
             btn_pendentes.bgcolor = "#BBDEFB"
         elif tela == "concluida":
+            if not paginas["concluida"]["carregada"]: carregar_pagina("concluida")
             lista_concluidas.visible = True
             btn_concluidas.bgcolor = "#C8E6C9"
         elif tela == "stats":
@@ -299,74 +250,187 @@ def main(page: ft.Page):
         page.update()
 
     def carregar_sugestoes():
-        linha_sugestoes.controls.clear()
-        nomes = db.listar_nomes_usados()
-        for nome in nomes:
-            if nome.strip():
-                linha_sugestoes.controls.append(ft.ElevatedButton(nome, height=30, bgcolor="#E3F2FD", color="#1565C0", on_click=lambda e, n=nome: clicar_sugestao(n)))
+        # No máximo LIMITE_SUGESTOES botões: os mais usados que começam com o que já foi digitado em "Quem?"
+        linha_sugestoes.controls = [ft.ElevatedButton(nome, height=30, bgcolor="#E3F2FD", color="#1565C0", on_click=lambda e, n=nome: clicar_sugestao(n))
+                                    for nome in db.sugerir_responsaveis(campo_responsavel.value or "")]
         page.update()
 
-    def criar_card(dados, feito):
-        id_t, titulo, status, resp, data_limite_str, criacao, conclusao, recorrencia = dados
-        cor_fundo, texto_extra, cor_texto_prazo, cor_destaque = "#F5F5F5", "", "grey", "grey"
-        try:
-            dt_criacao = datetime.strptime(criacao, "%d/%m/%Y %H:%M")
-            texto_info = f"👤 {resp} | Criado: {dt_criacao.strftime('%d/%m/%Y')}"
-            if recorrencia and recorrencia != "Não repete": texto_info += f" | 🔄 {recorrencia}"
-            if data_limite_str:
-                texto_info += f" | 🎯 {data_limite_str}"
-                dt_limite = datetime.strptime(data_limite_str, "%d/%m/%Y").replace(hour=23, minute=59)
-                hoje = datetime.now()
-                if feito and conclusao:
-                    dt_conclusao = datetime.strptime(conclusao, "%d/%m/%Y %H:%M")
-                    texto_info += f" | ✅ Em: {dt_conclusao.strftime('%d/%m/%Y')}"
-                    if dt_conclusao > dt_limite:
-                        texto_extra = f"⚠️ Atrasou {(dt_conclusao.date() - dt_limite.date()).days} dias"
-                        cor_destaque = "red"
-                    else: texto_extra, cor_destaque = "👏 Em dia", "green"
-                elif not feito and hoje > dt_limite:
-                    cor_fundo, cor_texto_prazo, cor_destaque = "#FFCDD2", "red", "red"
-                    texto_extra = f"⚠️ { (hoje.date() - dt_limite.date()).days } dias de atraso"
-        except: texto_info = f"👤 {resp}"
-
-        painel_card = ft.Container(padding=10, bgcolor=cor_fundo, border_radius=8, margin=ft.margin.only(bottom=10))
-        def check_changed(e):
-            db.atualizar_status(id_t, "concluida" if e.control.value else "pendente")
-            if campo_busca.value: executar_busca(None)
-            else: carregar_listas_normais()
-        def cancelar_exclusao(e):
-            painel_card.content = layout_normal
-            painel_card.bgcolor = cor_fundo
+    def criar_card(tarefa):
+        id_t = tarefa.id
+        @medir("ui.check_changed")
+        def check_changed(painel_card, marcado):
+            # Os cards das abas e os já exibidos na busca são refeitos pelo aviso do banco (aplicar_mudancas).
+            # Aqui fica só o que o aviso não cobre: card de tarefa que sumiu e ocorrência nova na busca.
+            tarefa, novas = db.atualizar_status(id_t, "concluida" if marcado else "pendente")
+            with trava_tela:
+                if tarefa is None: remover_card(painel_card)  # apagada ou arquivada enquanto o card estava na tela
+                elif coluna_busca.visible:
+                    # A ocorrência gerada casa com o mesmo termo
+                    exibidos = {c.data for c in lista_resultado_busca.controls}
+                    lista_resultado_busca.controls[0:0] = [criar_card(nova) for nova in novas if nova.id not in exibidos]
             page.update()
-        def confirmar_exclusao(e):
-            db.excluir(id_t)
-            if campo_busca.value: executar_busca(None)
-            else: carregar_listas_normais()
-        
-        layout_confirmacao = ft.Column([ft.Text("Apagar tarefa?", color="red", weight="bold", size=12), ft.Row([ft.ElevatedButton("Não", on_click=cancelar_exclusao, height=30), ft.ElevatedButton("Sim", on_click=confirmar_exclusao, bgcolor="red", color="white", height=30)], alignment="end")])
-        layout_normal = ft.Column([ft.Row([ft.Checkbox(label=titulo, value=feito, on_change=check_changed), ft.TextButton("X", on_click=lambda e: setattr(painel_card, 'content', layout_confirmacao) or setattr(painel_card, 'bgcolor', '#FFEBEE') or page.update(), style=ft.ButtonStyle(color="red"))], alignment="spaceBetween"), ft.Row([ft.Text(texto_info, size=11, color=cor_texto_prazo), ft.Text(texto_extra, size=11, weight="bold", color=cor_destaque)], alignment="spaceBetween")])
-        painel_card.content = layout_normal
-        return painel_card
+        def confirmar_exclusao(painel_card):
+            if db.excluir(id_t) is None:
+                with trava_tela: remover_card(painel_card)
+                page.update()
+        return montar_card(page, tarefa, check_changed, confirmar_exclusao)
+
+    def carregar_pagina(status):
+        # Acrescenta a próxima página de cards; a aba "Feitas" mostra as mais recentes primeiro
+        with trava_tela:
+            estado = paginas[status]
+            if estado["fim"] or estado["carregando"]: return
+            estado["carregando"] = True
+            lista = lista_pendentes if status == "pendente" else lista_concluidas
+            if lista.controls and lista.controls[-1].data == "mais": lista.controls.pop()
+            linhas = db.listar_pagina(status, estado["ultimo_id"], recentes_primeiro=(status == "concluida"))
+            exibidos = {c.data for c in lista.controls}
+            for t in linhas:
+                if t.id not in exibidos: lista.controls.append(criar_card(t))
+            if linhas: estado["ultimo_id"] = linhas[-1].id
+            estado["fim"] = len(linhas) < TAMANHO_PAGINA
+            if not estado["fim"]:
+                lista.controls.append(ft.TextButton("Carregar mais", data="mais", on_click=lambda e: carregar_pagina(status) or page.update()))
+            estado["carregada"], estado["carregando"] = True, False
+
+    def inserir_card(tarefa):
+        # Coloca o card na posição certa da aba, só se ele cair dentro das páginas já carregadas.
+        # Um card anterior da mesma tarefa (em qualquer aba) é substituído.
+        for lista in (lista_pendentes, lista_concluidas):
+            lista.controls[:] = [c for c in lista.controls if c.data != tarefa.id]
+        status = tarefa.status
+        if status not in paginas: return
+        estado = paginas[status]
+        if not estado["carregada"]: return
+        lista = lista_pendentes if status == "pendente" else lista_concluidas
+        recentes_primeiro = status == "concluida"
+        if not estado["fim"] and estado["ultimo_id"] is not None:
+            if (tarefa.id < estado["ultimo_id"]) if recentes_primeiro else (tarefa.id > estado["ultimo_id"]): return
+        posicao = 0
+        for c in lista.controls:
+            if c.data == "mais" or (c.data < tarefa.id if recentes_primeiro else c.data > tarefa.id): break
+            posicao += 1
+        lista.controls.insert(posicao, criar_card(tarefa))
+
+    def remover_card(card):
+        for lista in (lista_pendentes, lista_concluidas, lista_resultado_busca):
+            if card in lista.controls: lista.controls.remove(card)
+
+    def aplicar_mudancas(tipo, dados):
+        # Avisos do banco (escritas desta ou de outras sessões): única via pela qual as abas
+        # recebem cards novos ou alterados; corrige só os cards afetados.
+        if tipo == "recarregar":
+            if coluna_abas.visible: carregar_listas_normais()
+            return
+        if tipo == "prazos": verificar_urgencia(dados)  # entraram no alerta ou venceram com o app aberto; os cards são refeitos abaixo
+        with trava_tela:
+            if tipo == "removidas":
+                ids = set(dados)
+                for lista in (lista_pendentes, lista_concluidas, lista_resultado_busca):
+                    lista.controls[:] = [c for c in lista.controls if c.data not in ids]
+            else:
+                controles = lista_resultado_busca.controls
+                for tarefa in dados:
+                    inserir_card(tarefa)
+                    for i, c in enumerate(controles):
+                        if c.data == tarefa.id: controles[i] = criar_card(tarefa)
+            if area_estatisticas.visible: gerar_relatorio()
+            elif area_graficos.visible: gerar_graficos()
+        page.update()
+
+    def rolagem_principal(e):
+        # Rolagem infinita: perto do fim da tela, carrega a próxima página da aba visível ou da busca
+        if e.pixels < e.max_scroll_extent - 300: return
+        if coluna_busca.visible:
+            if busca["proximo"] is not None: carregar_mais_busca()
+            return
+        if not coluna_abas.visible: return
+        if lista_pendentes.visible: status = "pendente"
+        elif lista_concluidas.visible: status = "concluida"
+        else: return
+        if paginas[status]["fim"]: return
+        carregar_pagina(status)
+        page.update()
 
+    @medir("ui.carregar_listas_normais")
     def carregar_listas_normais():
-        coluna_abas.visible, coluna_busca.visible = True, False
-        lista_pendentes.controls.clear()
-        lista_concluidas.controls.clear()
-        for t in db.listar_por_status("pendente"): lista_pendentes.controls.append(criar_card(t, False))
-        for t in db.listar_por_status("concluida"): lista_concluidas.controls.append(criar_card(t, True))
+        with trava_tela:
+            coluna_abas.visible, coluna_busca.visible = True, False
+            lista_pendentes.controls.clear()
+            lista_concluidas.controls.clear()
+            for estado in paginas.values(): estado.update(ultimo_id=None, fim=False, carregada=False, carregando=False)
+            carregar_pagina("pendente")
+            if lista_concluidas.visible: carregar_pagina("concluida")
         page.update()
 
-    def executar_busca(e):
+    def cancelar_busca_agendada():
+        # Uma geração nova invalida a busca que a thread estiver esperando para rodar
+        with trava_tela:
+            geracao_busca[0] += 1
+            return geracao_busca[0]
+
+    def laco_busca():
+        # Thread única de busca da sessão: a conexão de leitura (uma por thread) é aberta uma vez
+        # e reaproveitada. Debounce: cada tecla que chega reinicia a espera.
+        while True:
+            geracao = fila_busca.get()
+            while geracao is not None:
+                try: geracao = fila_busca.get(timeout=ESPERA_BUSCA)
+                except queue.Empty: break
+            if geracao is None: return
+            if geracao == geracao_busca[0]: executar_busca(None, geracao)
+
+    @medir("ui.executar_busca")
+    def executar_busca(e, geracao=None):
+        # Chamada direta pesquisa na hora; vinda do temporizador, desiste se o texto mudou nesse meio tempo.
+        # Inclui o arquivo: as concluídas antigas saem das abas na manutenção, mas continuam acháveis aqui
+        if geracao is None: geracao = cancelar_busca_agendada()
         termo = campo_busca.value
         if not termo: return carregar_listas_normais()
-        coluna_abas.visible, coluna_busca.visible = False, True
-        lista_resultado_busca.controls.clear()
-        resultados = db.buscar_tudo(termo)
-        if not resultados: lista_resultado_busca.controls.append(ft.Text("Nada encontrado.", italic=True))
-        else: 
-            for t in resultados: lista_resultado_busca.controls.append(criar_card(t, t[2] == "concluida"))
+        resultados, proximo = db.buscar_tudo(termo, incluir_arquivo=True)
+        if geracao != geracao_busca[0]: return
+        if not resultados: cards = [ft.Text("Nada encontrado.", italic=True)]
+        else: cards = [criar_card(t) for t in resultados]
+        if proximo is not None: cards.append(botao_mais_busca())
+        with trava_tela:
+            # Conferida dentro da trava: limpar_busca/outra busca que já mudaram a tela não são sobrescritas
+            if geracao != geracao_busca[0]: return
+            busca.update(termo=termo, proximo=proximo)
+            coluna_abas.visible, coluna_busca.visible = False, True
+            lista_resultado_busca.controls[:] = cards
         page.update()
 
+    def botao_mais_busca():
+        return ft.TextButton("Carregar mais", data="mais", on_click=lambda e: carregar_mais_busca())
+
+    def carregar_mais_busca():
+        # Próxima página da busca exibida, a partir do marcador da anterior
+        with trava_tela:
+            termo, apos = busca["termo"], busca["proximo"]
+            if apos is None: return
+            busca["proximo"] = None  # evita pedir a mesma página duas vezes durante a rolagem
+            controles = lista_resultado_busca.controls
+            if controles and controles[-1].data == "mais": controles.pop()
+            resultados, proximo = db.buscar_tudo(termo, apos, incluir_arquivo=True)
+            if busca["termo"] != termo: return
+            exibidos = {c.data for c in controles}
+            controles.extend(criar_card(t) for t in resultados if t.id not in exibidos)
+            if proximo is not None: controles.append(botao_mais_busca())
+            busca["proximo"] = proximo
+        page.update()
+
+    def busca_digitada(e):
+        # Debounce: cada tecla reinicia a espera; a consulta roda fora do handler
+        geracao = cancelar_busca_agendada()
+        if not campo_busca.value: return carregar_listas_normais()
+        fila_busca.put(geracao)
+
+    def limpar_busca(e):
+        cancelar_busca_agendada()
+        campo_busca.value = ""
+        carregar_listas_normais()
+
+    @medir("ui.adicionar_click")
     def adicionar_click(e):
         if not campo_tarefa.value: return
         db.adicionar(campo_tarefa.value, campo_responsavel.value if campo_responsavel.value else "Geral", data_selecionada_temp[0] if data_selecionada_temp[0] else "", dropdown_recorrencia.value)
@@ -374,16 +438,16 @@ def main(page: ft.Page):
         data_selecionada_temp[0] = None
         btn_calendario.text, btn_calendario.icon, btn_calendario.bgcolor = "Prazo", ft.Icons.CALENDAR_MONTH_OUTLINED, "white"
         dropdown_recorrencia.value = "Não repete"
-        if campo_busca.value: executar_busca(None)
-        else: carregar_listas_normais()
+        # O card entra nas abas pelo aviso do banco; a busca aberta é refeita
+        if coluna_busca.visible: executar_busca(None)
         carregar_sugestoes()
 
     # --- UI ---
-    campo_busca = ft.TextField(hint_text="🔍 Buscar...", expand=True, on_change=executar_busca, height=40)
-    btn_limpar_busca = ft.IconButton(icon=ft.Icons.CLOSE, on_click=lambda e: setattr(campo_busca, 'value', "") or carregar_listas_normais(), tooltip="Limpar")
+    campo_busca = ft.TextField(hint_text="🔍 Buscar...", expand=True, on_change=busca_digitada, height=40)
+    btn_limpar_busca = ft.IconButton(icon=ft.Icons.CLOSE, on_click=limpar_busca, tooltip="Limpar")
     campo_tarefa = ft.TextField(label="O que fazer?", border_color="blue", expand=True)
-    campo_responsavel = ft.TextField(label="Quem?", hint_text="Nome", expand=True, height=50)
-    dropdown_recorrencia = ft.Dropdown(options=[ft.dropdown.Option(x) for x in ["Não repete", "Diária", "Semanal", "Mensal", "Anual"]], value="Não repete", label="Repetição", height=48, content_padding=10, expand=True)
+    campo_responsavel = ft.TextField(label="Quem?", hint_text="Nome", expand=True, height=50, on_change=lambda e: carregar_sugestoes())
+    dropdown_recorrencia = ft.Dropdown(options=[ft.dropdown.Option(x) for x in ["Não repete", "Diária", "Dias úteis", "Semanal", "A cada 2 semanas", "Mensal", "Anual"]], value="Não repete", label="Repetição", height=48, content_padding=10, expand=True)
     btn_calendario = ft.ElevatedButton("Prazo", icon=ft.Icons.CALENDAR_MONTH_OUTLINED, on_click=abrir_calendario, height=48, style=ft.ButtonStyle(shape=ft.RoundedRectangleBorder(radius=8)), bgcolor="white", color="#1565C0", expand=True)
     btn_add = ft.ElevatedButton("+", on_click=adicionar_click, bgcolor="#1565C0", color="white", width=60, height=48, style=ft.ButtonStyle(shape=ft.RoundedRectangleBorder(radius=8)))
     
@@ -411,7 +475,7 @@ def main(page: ft.Page):
             alignment=ft.Alignment(0, 0), # CORREÇÃO AQUI
             padding=10
         )
-    ], scroll="auto", expand=True)
+    ], scroll="auto", expand=True, on_scroll=rolagem_principal)
 
     # Container Pai (para dar o padding da tela sem usar na Column)
     layout_principal = ft.Container(
@@ -420,7 +484,27 @@ def main(page: ft.Page):
         expand=True
     )
 
+    def tecla(e):
+        if e.key == "F9" and medicao.ativa(): logging.info("\n" + medicao.formatar_resumo())
+    page.on_keyboard_event = tecla
+
+    def relatar_inicio(etapa):
+        agora = time.perf_counter()
+        if medicao.ativa(): medicao.registrar(f"inicio.{etapa}", agora - inicio_sessao)  # desligada: só a linha de log
+        log_inicio.info("%s: %.0f ms desde main(), %.0f ms desde o início do processo", etapa, (agora - inicio_sessao) * 1000, (agora - INICIO_PROCESSO) * 1000)
+
+    def carregar_em_segundo_plano():
+        # O que não cabe na primeira tela: sugestões, pop-up de urgência e a primeira página de "Feitas"
+        carregar_sugestoes()
+        verificar_urgencia()
+        if not paginas["concluida"]["carregada"]:
+            carregar_pagina("concluida")
+            page.update()
+        relatar_inicio("carga_completa")
+
     # --- ADICIONA A STACK (CAMADAS) ---
+    # Início progressivo: pinta a estrutura vazia, depois a primeira página de pendentes, depois o resto
+    lista_pendentes.controls.append(ft.Text("Carregando...", italic=True, color="grey"))
     page.add(
         ft.Stack(
             [
@@ -430,9 +514,26 @@ def main(page: ft.Page):
             expand=True
         )
     )
-    
+    relatar_inicio("primeira_pintura")
+
+    if db is None: banco_pronto.wait()
+    if db is None:
+        lista_pendentes.controls[:] = [ft.Text(f"Não foi possível abrir o banco de dados: {erro_banco}", color="red", weight="bold")]
+        return page.update()
+    # Assina antes da primeira página: uma escrita feita durante a carga chega como aviso,
+    # e carregar_pagina/inserir_card não duplicam o card se ela também vier na consulta
+    db.assinar(aplicar_mudancas)
+    page.on_close = lambda e: db.cancelar_assinatura(aplicar_mudancas) or fila_busca.put(None)
     carregar_listas_normais()
-    carregar_sugestoes()
-    verificar_urgencia()
-
-ft.app(target=main)
\ No newline at end of file
+    relatar_inicio("primeira_pagina")
+    threading.Thread(target=carregar_em_segundo_plano, name="carga-inicial", daemon=True).start()
+    threading.Thread(target=laco_busca, name="busca", daemon=True).start()
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO if medicao.ativa() else logging.WARNING)
+    log_inicio.setLevel(logging.INFO)
+    if medicao.ativa():
+        # Resumo de tempos no log ao apertar F9 e ao fechar o app
+        atexit.register(lambda: logging.info("\n" + medicao.formatar_resumo()))
+    threading.Thread(target=abrir_banco, name="abrir-banco", daemon=True).start()
+    ft.app(target=main)
@@ -0,0 +1,102 @@
+# Medição de tempos do app: quanto custa cada método do banco e cada handler da interface.
+#
+# Desligada por padrão (custo: um teste de flag por chamada). Para ligar:
+#   TAREFAS_MEDIR=1 TAREFAS_LIMITE_LENTO_MS=50 python main.py
+# ou, em código, medicao.ativar(limite_lento_ms=50). Operações acima do limite vão
+# para o logger "tarefas.lento"; medicao.resumo() dá p50/p95/p99 por operação.
+import os
+import time
+import logging
+import threading
+import functools
+from collections import defaultdict, deque
+
+AMOSTRAS_POR_OPERACAO = 10000  # guarda só as mais recentes de cada operação
+
+log_lento = logging.getLogger("tarefas.lento")
+
+_ativo = os.environ.get("TAREFAS_MEDIR", "") not in ("", "0")
+_limite_lento = float(os.environ.get("TAREFAS_LIMITE_LENTO_MS", "100")) / 1000
+_amostras = defaultdict(lambda: deque(maxlen=AMOSTRAS_POR_OPERACAO))
+_chamadas = defaultdict(int)  # total por operação; as amostras param em AMOSTRAS_POR_OPERACAO
+_contadores = defaultdict(int)
+_trava = threading.Lock()
+
+def ativar(limite_lento_ms=None):
+    global _ativo, _limite_lento
+    _ativo = True
+    if limite_lento_ms is not None: _limite_lento = limite_lento_ms / 1000
+
+def desativar():
+    global _ativo
+    _ativo = False
+
+def ativa():
+    return _ativo
+
+def limpar():
+    with _trava:
+        _amostras.clear()
+        _chamadas.clear()
+        _contadores.clear()
+
+def registrar(nome, segundos):
+    with _trava:
+        _amostras[nome].append(segundos)
+        _chamadas[nome] += 1
+    if segundos >= _limite_lento: log_lento.warning("%s levou %.1f ms", nome, segundos * 1000)
+
+def medir(nome):
+    # Decorador: cronometra cada chamada quando a medição está ligada
+    def decorador(funcao):
+        @functools.wraps(funcao)
+        def envolvida(*args, **kwargs):
+            if not _ativo: return funcao(*args, **kwargs)
+            inicio = time.perf_counter()
+            try: return funcao(*args, **kwargs)
+            finally: registrar(nome, time.perf_counter() - inicio)
+        return envolvida
+    return decorador
+
+def medir_classe(prefixo):
+    # Decorador de classe: aplica medir() a todos os métodos públicos
+    def decorador(classe):
+        for nome, valor in list(vars(classe).items()):
+            if callable(valor) and not nome.startswith("_"):
+                setattr(classe, nome, medir(f"{prefixo}.{nome}")(valor))
+        return classe
+    return decorador
+
+def contar(nome, funcao):
+    # Envolve funcao para contar quantas vezes foi chamada (ex.: page.update)
+    @functools.wraps(funcao)
+    def envolvida(*args, **kwargs):
+        if _ativo:
+            with _trava: _contadores[nome] += 1
+        return funcao(*args, **kwargs)
+    return envolvida
+
+def _percentil(ordenados, p):
+    return ordenados[min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))]
+
+def resumo():
+    # {operação: {chamadas, p50_ms, p95_ms, p99_ms, max_ms}} e {contador: total}; percentis sobre as amostras guardadas
+    with _trava:
+        copias = {nome: sorted(valores) for nome, valores in _amostras.items() if valores}
+        chamadas = dict(_chamadas)
+        contadores = dict(_contadores)
+    operacoes = {}
+    for nome, valores in sorted(copias.items()):
+        operacoes[nome] = {"chamadas": chamadas[nome], "p50_ms": _percentil(valores, 50) * 1000,
+                           "p95_ms": _percentil(valores, 95) * 1000, "p99_ms": _percentil(valores, 99) * 1000,
+                           "max_ms": valores[-1] * 1000}
+    return {"operacoes": operacoes, "contadores": contadores}
+
+def formatar_resumo():
+    dados = resumo()
+    linhas = [f"{'operação':40} {'n':>7} {'p50':>9} {'p95':>9} {'p99':>9} {'máx':>9}"]
+    for nome, m in dados["operacoes"].items():
+        linhas.append(f"{nome:40} {m['chamadas']:>7} {m['p50_ms']:>8.2f}ms {m['p95_ms']:>8.2f}ms {m['p99_ms']:>8.2f}ms {m['max_ms']:>8.2f}ms")
+    for nome, total in sorted(dados["contadores"].items()):
+        linhas.append(f"{nome:40} {total:>7}")
+    return "\n".join(linhas)
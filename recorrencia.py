@@ -0,0 +1,110 @@
+# Regras de recorrência e cálculo das próximas ocorrências. Sem dependências (nem do
+# banco nem do Flet). A regra fica gravada como texto na coluna `recorrencia`:
+#
+#   "Diária", "Semanal", "Mensal", "Anual"    (valores antigos, intervalo 1)
+#   "A cada 2 semanas", "A cada 3 dias", "A cada 6 meses"
+#   "Semanal: seg, qua, sex", "A cada 2 semanas: ter, qui", "Dias úteis"
+#
+# As datas são calculadas em forma fechada (sem laço sobre as ocorrências), uma regra por
+# vez para todas as tarefas que a usam: concluir mil tarefas atrasadas custa mil contas.
+import re
+import calendar
+import unicodedata
+from bisect import bisect_right
+from datetime import date
+from functools import lru_cache
+
+DIAS_SEMANA = ("seg", "ter", "qua", "qui", "sex", "sab", "dom")
+MAX_RECUPERADAS = 60  # teto de ocorrências geradas por tarefa ao recuperar as perdidas
+
+_UNIDADES = {"dia": "dia", "dias": "dia", "semana": "semana", "semanas": "semana",
+             "mes": "mes", "meses": "mes", "ano": "ano", "anos": "ano"}
+_NOMES = {"diaria": ("dia", 1), "semanal": ("semana", 1), "mensal": ("mes", 1), "anual": ("ano", 1)}
+_FORMATO = re.compile(r"^(?:a cada (\d+) (\w+)|(\w+))(?:\s*:\s*(.+))?$")
+
+class Regra:
+    # unidade: "dia", "semana", "mes" ou "ano"; dias_semana (0 = segunda) só para semanas
+    __slots__ = ("unidade", "intervalo", "dias_semana")
+
+    def __init__(self, unidade, intervalo=1, dias_semana=()):
+        if unidade not in ("dia", "semana", "mes", "ano") or intervalo < 1: raise ValueError(f"regra inválida: {unidade} / {intervalo}")
+        if dias_semana and unidade != "semana": raise ValueError("dias da semana só valem para regras semanais")
+        self.unidade = unidade
+        self.intervalo = intervalo
+        self.dias_semana = tuple(sorted(set(dias_semana)))
+
+    def __repr__(self):
+        return f"Regra({self.unidade!r}, {self.intervalo}, {self.dias_semana})"
+
+    def ocorrencias(self, limites, hoje, recuperar=False):
+        # Para cada prazo, as datas a gerar ao concluir: a primeira depois do prazo que não
+        # esteja no passado; com recuperar=True, também as perdidas entre o prazo e ela.
+        if self.unidade in ("mes", "ano"): return self._por_mes(limites, hoje, recuperar)
+        return self._por_dia(limites, hoje, recuperar)
+
+    def _por_dia(self, limites, hoje, recuperar):
+        # Ocorrência n = base + (n // m) * ciclo + deslocamentos[n % m], com m deslocamentos por ciclo
+        ciclo = self.intervalo * (7 if self.unidade == "semana" else 1)
+        deslocamentos = self.dias_semana or (0,)
+        m, dia_hoje = len(deslocamentos), hoje.toordinal()
+        resultado = []
+        for limite in limites:
+            dia = limite.toordinal()
+            base = dia - limite.weekday() if self.dias_semana else dia
+            def indice_apos(x):  # primeiro n com ocorrência > x
+                q, r = divmod(x - base, ciclo)
+                return q * m + bisect_right(deslocamentos, r)
+            primeiro = indice_apos(dia)
+            futuro = max(primeiro, indice_apos(dia_hoje - 1))
+            inicio = max(primeiro, futuro - MAX_RECUPERADAS + 1) if recuperar else futuro
+            resultado.append([date.fromordinal(base + (n // m) * ciclo + deslocamentos[n % m]) for n in range(inicio, futuro + 1)])
+        return resultado
+
+    def _por_mes(self, limites, hoje, recuperar):
+        # Conta em meses desde o ano 0; o dia do prazo é mantido e cortado no fim do mês (31 -> 30, 29/02 -> 28/02)
+        passo = self.intervalo * (12 if self.unidade == "ano" else 1)
+        mes_hoje = hoje.year * 12 + hoje.month - 1
+        resultado = []
+        for limite in limites:
+            mes_limite = limite.year * 12 + limite.month - 1
+            def em(k):
+                ano, mes = divmod(mes_limite + k * passo, 12)
+                return date(ano, mes + 1, min(limite.day, calendar.monthrange(ano, mes + 1)[1]))
+            futuro = max(1, -(-(mes_hoje - mes_limite) // passo))
+            if em(futuro) < hoje: futuro += 1
+            inicio = max(1, futuro - MAX_RECUPERADAS + 1) if recuperar else futuro
+            resultado.append([em(k) for k in range(inicio, futuro + 1)])
+        return resultado
+
+def sem_acento(texto):
+    # Minúsculas e sem acento ("Diária" -> "diaria"); também usado pelo índice de nomes do banco
+    return "".join(c for c in unicodedata.normalize("NFKD", texto.lower()) if not unicodedata.combining(c))
+
+@lru_cache(maxsize=256)
+def regra(texto):
+    # Texto da coluna -> Regra, ou None para "Não repete", vazio ou texto desconhecido
+    texto = sem_acento((texto or "").strip())
+    if texto == "dias uteis": return Regra("semana", 1, range(5))
+    achado = _FORMATO.match(texto)
+    if not achado: return None
+    intervalo, unidade, nome, dias = achado.groups()
+    if nome:
+        if nome not in _NOMES: return None
+        unidade, intervalo = _NOMES[nome]
+    else:
+        unidade, intervalo = _UNIDADES.get(unidade), int(intervalo)
+    try:
+        dias_semana = [DIAS_SEMANA.index(d.strip()[:3]) for d in dias.split(",")] if dias else ()
+        return Regra(unidade, intervalo, dias_semana)
+    except ValueError:
+        return None
+
+def proximas_ocorrencias(tarefas, hoje, recuperar=False):
+    # [(tarefa, [datas])] para as recorrentes com prazo; agrupa por regra para calcular tudo de uma vez
+    grupos = {}
+    for t in tarefas:
+        if t.data_limite and regra(t.recorrencia): grupos.setdefault(t.recorrencia, []).append(t)
+    resultado = []
+    for texto, grupo in grupos.items():
+        resultado += zip(grupo, regra(texto).ocorrencias([t.data_limite for t in grupo], hoje, recuperar))
+    return resultado
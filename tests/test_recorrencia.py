@@ -0,0 +1,74 @@
+from datetime import date
+
+import pytest
+
+from recorrencia import MAX_RECUPERADAS, Regra, proximas_ocorrencias, regra, sem_acento
+
+def proximas(texto, limite, hoje, recuperar=False):
+    return regra(texto).ocorrencias([limite], hoje, recuperar)[0]
+
+@pytest.mark.parametrize("texto, esperado", [
+    ("Diária", ("dia", 1, ())),
+    ("Semanal", ("semana", 1, ())),
+    ("Mensal", ("mes", 1, ())),
+    ("Anual", ("ano", 1, ())),
+    ("A cada 2 semanas", ("semana", 2, ())),
+    ("a cada 3 MESES", ("mes", 3, ())),
+    ("Semanal: seg, qua, sex", ("semana", 1, (0, 2, 4))),
+    ("A cada 2 semanas: qui, ter", ("semana", 2, (1, 3))),
+    ("Dias úteis", ("semana", 1, (0, 1, 2, 3, 4))),
+])
+def test_textos_validos(texto, esperado):
+    r = regra(texto)
+    assert (r.unidade, r.intervalo, r.dias_semana) == esperado
+
+@pytest.mark.parametrize("texto", ["Não repete", "", None, "xyz", "A cada 0 dias", "Mensal: seg", "Semanal: xyz"])
+def test_textos_sem_regra(texto):
+    assert regra(texto) is None
+
+def test_regra_invalida_levanta():
+    with pytest.raises(ValueError): Regra("hora")
+    with pytest.raises(ValueError): Regra("dia", 1, (0,))
+
+def test_mensal_corta_no_fim_do_mes():
+    assert proximas("Mensal", date(2026, 1, 31), date(2026, 1, 1)) == [date(2026, 2, 28)]
+    assert proximas("Mensal", date(2028, 1, 31), date(2028, 1, 1)) == [date(2028, 2, 29)]
+    assert proximas("Mensal", date(2026, 12, 15), date(2026, 1, 1)) == [date(2027, 1, 15)]
+
+def test_anual_em_29_de_fevereiro():
+    assert proximas("Anual", date(2024, 2, 29), date(2024, 3, 1)) == [date(2025, 2, 28)]
+    assert proximas("A cada 4 anos", date(2024, 2, 29), date(2024, 3, 1)) == [date(2028, 2, 29)]
+
+def test_dias_da_semana():
+    # 14/10/2026 é quarta
+    assert proximas("Semanal: seg, qua, sex", date(2026, 10, 14), date(2026, 10, 1)) == [date(2026, 10, 16)]
+    assert proximas("Dias úteis", date(2026, 10, 16), date(2026, 10, 1)) == [date(2026, 10, 19)]
+    assert proximas("A cada 2 semanas: ter, qui", date(2026, 10, 15), date(2026, 10, 1)) == [date(2026, 10, 27)]
+
+def test_intervalo_pula_para_a_proxima_futura():
+    hoje = date(2026, 10, 17)
+    assert proximas("A cada 2 semanas", date(2026, 10, 1), hoje) == [date(2026, 10, 29)]
+    assert proximas("A cada 2 semanas", date(2026, 10, 30), hoje) == [date(2026, 11, 13)]
+    assert proximas("Diária", date(2026, 10, 10), hoje) == [hoje]
+    assert proximas("Mensal", date(2026, 1, 15), hoje) == [date(2026, 11, 15)]
+
+def test_recuperar_gera_as_perdidas():
+    hoje = date(2026, 10, 17)
+    assert proximas("Diária", date(2026, 10, 14), hoje, True) == [date(2026, 10, 15), date(2026, 10, 16), hoje]
+    assert proximas("Semanal: seg, qua, sex", date(2026, 10, 12), hoje, True) == [date(2026, 10, 14), date(2026, 10, 16), date(2026, 10, 19)]
+    assert proximas("Mensal", date(2026, 7, 31), hoje, True) == [date(2026, 8, 31), date(2026, 9, 30), date(2026, 10, 31)]
+
+def test_recuperar_tem_teto():
+    datas = proximas("Diária", date(2020, 1, 1), date(2026, 10, 17), True)
+    assert len(datas) == MAX_RECUPERADAS and datas[-1] == date(2026, 10, 17)
+
+def test_agrupa_por_regra():
+    class T:
+        def __init__(self, limite, recorrencia): self.data_limite, self.recorrencia = limite, recorrencia
+    hoje = date(2026, 10, 17)
+    tarefas = [T(date(2026, 10, 20), "Diária"), T(None, "Diária"), T(date(2026, 10, 20), "Não repete"), T(date(2026, 10, 20), "Semanal")]
+    resultado = {t.recorrencia: datas for t, datas in proximas_ocorrencias(tarefas, hoje)}
+    assert resultado == {"Diária": [date(2026, 10, 21)], "Semanal": [date(2026, 10, 27)]}
+
+def test_sem_acento():
+    assert sem_acento("João Ação") == "joao acao"